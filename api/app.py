@@ -19,6 +19,7 @@ from routes import (
 )
 from utils.json_encoder import CustomJSONEncoder
 from utils.app import error
+from services import database, aggregates
 
 
 # Avoid not found error
@@ -45,6 +46,69 @@ def create_app():
     )
 
     app.json_encoder = CustomJSONEncoder
+
+    # The columns and indexes added at startup and the aggregates repaired
+    # because of them, reported by init-db
+    app.extensions['schema_migrated'] = []
+    app.extensions['aggregates_repaired'] = {}
+
+    if os.getenv('DB_CREATE_SCHEMA', 'true').lower() in ['1', 'true', 'yes']:
+        migrated = database.create_schema()
+        app.extensions['schema_migrated'] = migrated
+        app.extensions['aggregates_repaired'] = (
+            aggregates.repair_migrated(migrated)
+        )
+
+    @app.before_request
+    def begin_request_session():
+        '''Shares one database session among the request entity calls'''
+        database.begin_request_session()
+
+    @app.after_request
+    def rollback_failed_request(response):
+        '''Rolls back the request changes if the response is an error'''
+        if response.status_code >= 400:
+            database.end_request_session(rollback=True)
+
+        return response
+
+    @app.teardown_request
+    def end_request_session(exception=None):
+        '''Commits the request changes unless an error occurred'''
+        database.end_request_session(rollback=exception is not None)
+
+    @app.cli.command('init-db')
+    def init_db():
+        '''Creates or migrates the database schema and reports its state.
+
+        The app creation may have migrated the schema already, its changes
+        are reported with the ones made by the command. The aggregates are
+        repaired when their columns are added.
+        '''
+        command_migrated = database.create_schema()
+        migrated = app.extensions['schema_migrated'] + command_migrated
+        repaired = {
+            **app.extensions['aggregates_repaired'],
+            **aggregates.repair_migrated(command_migrated)
+        }
+
+        for name in migrated:
+            print(f"Added {name}")
+
+        for entity, count in repaired.items():
+            print(f"Repaired {count} {entity}")
+
+        tables = database.get_table_names()
+        print(
+            f"Schema up to date: {len(tables)} tables "
+            f"({', '.join(tables)})"
+        )
+
+    @app.cli.command('repair-aggregates')
+    def repair_aggregates():
+        '''Recomputes the stored place and partner aggregates'''
+        for entity, count in aggregates.repair().items():
+            print(f"Repaired {count} {entity}")
     
     app.register_error_handler(Exception, error)
     app.register_blueprint(root.blueprint)
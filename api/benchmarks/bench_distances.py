@@ -0,0 +1,96 @@
+'''Benchmarks the distance filter on a large amount of places.
+
+It compares the former filter_places_by_distance implementation, which
+called the scalar get_distance on each place, with the vectorized kernel.
+
+Run from the api folder: python -m benchmarks.bench_distances [PLACES]
+'''
+import sys
+import time as timer
+from random import uniform
+
+import numpy as np
+
+from entities.place import Place
+from entities.location import Location
+from services import geography
+
+# Avoid not found error
+from entities.user import User
+from entities.partner import Partner
+from entities.query import Query
+from entities.solution import Solution
+
+
+def legacy_filter_places_by_distance(location, places, radius=0) -> list:
+    '''The former distance filter, kept as the benchmark baseline'''
+    distances = map(
+        lambda x: geography.get_distance(location, x.location),
+        places
+    )
+    with_distance = zip(places, distances)
+    filtered = filter(lambda x: x[1] < radius, with_distance) if radius else 0
+    srtd = sorted(filtered or with_distance, key=lambda x: x[1])
+
+    return [x[0] for x in srtd]
+
+
+def measure(function) -> float:
+    '''Returns the duration of a function call in milliseconds'''
+    start = timer.perf_counter()
+    function()
+
+    return (timer.perf_counter() - start) * 1000
+
+
+def run(places:int=100000, radius:int=50000) -> dict:
+    '''Times the distance filters on random places around Switzerland.
+
+    ARGS:
+        places: The amount of places to filter.
+        radius: The search radius in meters.
+
+    RETURNS:
+        timings: The duration of each filter in milliseconds.
+    '''
+    location = Location(lat=46.8, lng=8.2)
+    random_places = [
+        Place(
+            name='',
+            location=Location(
+                lat=uniform(45.8, 47.8),
+                lng=uniform(5.9, 10.5)
+            ),
+            types=[]
+        )
+        for x in range(places)
+    ]
+    coordinates = np.array([
+        (place.location.lat, place.location.lng)
+        for place in random_places
+    ])
+
+    return {
+        'scalar_filter': measure(lambda: legacy_filter_places_by_distance(
+            location,
+            random_places,
+            radius
+        )),
+        'vectorized_filter': measure(
+            lambda: geography.filter_places_by_distance(
+                location,
+                random_places,
+                radius
+            )
+        ),
+        'vectorized_kernel': measure(
+            lambda: geography.get_distances(location, coordinates, radius)
+        )
+    }
+
+
+if __name__ == '__main__':
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    for name, milliseconds in run(places).items():
+        print(f"{name}: {milliseconds:.1f} ms for {places} places")
@@ -0,0 +1,112 @@
+'''Benchmarks the entity counts on a populated query table.
+
+It compares the former get_count implementation, which loaded every row to
+count them, with the SQL COUNT, and the seven statistics overview counts
+with the single aggregate statement.
+
+Run from the api folder: python -m benchmarks.bench_get_count [ROWS]
+'''
+import os
+import sys
+import tempfile
+import time as timer
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from entities.user import UserRow
+from entities.place import PlaceRow
+from entities.partner import PartnerRow
+from entities.query import Query, QueryRow
+from entities.review import ReviewRow
+from services import database, aggregates
+
+# Avoid not found error
+from entities.solution import Solution
+
+
+def legacy_get_count(row_class, filter_by:dict={}) -> int:
+    '''The former get_count implementation, kept as the benchmark baseline'''
+    with database.session_scope() as db_session:
+        return len(db_session.query(row_class).filter_by(**filter_by).all())
+
+
+def legacy_overview_counts() -> list:
+    '''The former statistics overview, one count per entity call'''
+    return [
+        legacy_get_count(UserRow, {'role': 'user'}),
+        legacy_get_count(UserRow, {'role': 'user', 'confirmed': True}),
+        legacy_get_count(QueryRow),
+        legacy_get_count(QueryRow, {'user_id': None}),
+        legacy_get_count(PlaceRow),
+        legacy_get_count(PartnerRow),
+        legacy_get_count(ReviewRow)
+    ]
+
+
+def populate(rows:int, batch_size:int=50000):
+    '''Inserts anonymous query rows in bulk'''
+    query = Query.generate_random()
+    values = {
+        'created': datetime.utcnow(),
+        'updated': datetime.utcnow(),
+        'location_lat': query.location.lat,
+        'location_lng': query.location.lng,
+        'interval_start': query.interval.start,
+        'interval_end': query.interval.end,
+        'radius': query.radius,
+        'max_travel': query.max_travel,
+        'max_walk': query.max_walk,
+        'max_results': query.max_results
+    }
+
+    with database.get_engine().begin() as connection:
+        for start in range(0, rows, batch_size):
+            connection.execute(
+                insert(QueryRow),
+                [values] * min(batch_size, rows - start)
+            )
+
+
+def measure(function) -> float:
+    '''Returns the duration of a function call in milliseconds'''
+    start = timer.perf_counter()
+    function()
+
+    return (timer.perf_counter() - start) * 1000
+
+
+def run(rows:int=1000000) -> dict:
+    '''Times the counts on a database populated with queries.
+
+    ARGS:
+        rows: The amount of query rows to insert.
+
+    RETURNS:
+        timings: The duration of each count in milliseconds.
+    '''
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+    os.environ['DB_ENGINE'] = f"sqlite:///{db_path}"
+    database.reset()
+    database.create_schema()
+
+    populate(rows)
+
+    timings = {
+        'query_count_legacy': measure(lambda: legacy_get_count(QueryRow)),
+        'query_count_sql': measure(Query.get_count),
+        'overview_legacy': measure(legacy_overview_counts),
+        'overview_single_statement': measure(aggregates.get_overview_counts)
+    }
+
+    database.reset()
+    os.remove(db_path)
+
+    return timings
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    for name, milliseconds in run(rows).items():
+        print(f"{name}: {milliseconds:.1f} ms for {rows} queries")
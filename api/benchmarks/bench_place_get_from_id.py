@@ -0,0 +1,78 @@
+'''Benchmarks the per-call database overhead of Place.get_from_id.
+
+It compares the former session factory, which built an engine and ran
+create_all on each call, with the process-wide engine registry.
+
+Run from the api folder: python -m benchmarks.bench_place_get_from_id
+'''
+import os
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from entities.place import Place
+from services import database
+
+# Avoid not found error
+from entities.user import User
+from entities.partner import Partner
+from entities.query import Query
+from entities.solution import Solution
+
+
+def legacy_create_session(engine=None):
+    '''The former session factory, kept here as the benchmark baseline'''
+    db_engine = create_engine(database.get_url(engine))
+    database.Base.metadata.create_all(db_engine)
+
+    return sessionmaker(bind=db_engine)
+
+
+def run(calls:int=200) -> dict:
+    '''Times Place.get_from_id with both session factories.
+
+    ARGS:
+        calls: The amount of Place.get_from_id calls to time.
+
+    RETURNS:
+        timings: The mean time per call in milliseconds for each factory.
+    '''
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+    os.environ['DB_ENGINE'] = f"sqlite:///{db_path}"
+    database.reset()
+    database.create_schema()
+
+    place_id = Place.generate_random().save()
+
+    registry_create_session = database.create_session
+    timings = {}
+
+    try:
+        database.create_session = legacy_create_session
+        timings['engine_per_call'] = timeit.timeit(
+            lambda: Place.get_from_id(place_id),
+            number=calls
+        ) / calls * 1000
+
+    finally:
+        database.create_session = registry_create_session
+
+    timings['engine_registry'] = timeit.timeit(
+        lambda: Place.get_from_id(place_id),
+        number=calls
+    ) / calls * 1000
+
+    database.reset()
+    os.remove(db_path)
+
+    return timings
+
+
+if __name__ == '__main__':
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    for name, milliseconds in run(calls).items():
+        print(f"{name}: {milliseconds:.3f} ms per Place.get_from_id")
@@ -1,7 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, InitVar
 from datetime import datetime
 import random
-import statistics
 from typing import List
 
 from sqlalchemy import Column as ORMColumn
@@ -10,11 +9,12 @@ from sqlalchemy import Integer as ORMInteger
 from sqlalchemy import String as ORMString
 from sqlalchemy import Float as ORMFloat
 from sqlalchemy import PickleType as ORMPickleType
+from sqlalchemy import func, select
 from sqlalchemy.orm import relationship
 
 from services import database
 from .location import Location
-from .review import Review
+from .review import Review, ReviewRow
 from .relations import QueryPartnerRow
 from utils import time
 from utils.faker import faker
@@ -38,6 +38,9 @@ class PartnerRow(database.Base):
     location_lat = ORMColumn(ORMFloat)
     location_lng = ORMColumn(ORMFloat)
     types = ORMColumn(ORMPickleType)
+    rating_sum = ORMColumn(ORMInteger, default=0)
+    review_count = ORMColumn(ORMInteger, default=0)
+    query_count = ORMColumn(ORMInteger, default=0)
 
     query_relations = relationship('QueryPartnerRow', cascade='delete')
     reviews = relationship('ReviewRow', cascade='delete')
@@ -59,6 +62,7 @@ class Partner:
         review_count: The amount of reviews received.
         average_rating: The average rating obtained from reviews.
         query_count: The amount of query relations.
+        fetch_stats: If the statistics have to be fetched from the database.
     '''
     name:str
     location:Location
@@ -72,25 +76,75 @@ class Partner:
     created:datetime=None
     updated:datetime=None
 
+    fetch_stats:InitVar[bool]=True
 
-    def __post_init__(self):
-        '''Get additional data from database relations'''
-        reviews = Review.get_all(filter_by={'partner_id': self.id})
 
-        self.review_count = len(reviews)
-        self.average_rating = statistics.mean([
-            review.rating for review in reviews
-        ]) if reviews else 0
+    def __post_init__(self, fetch_stats:bool):
+        '''Get additional data from database relations.
 
-        with database.create_session().begin() as db_session:
-            self.query_count = len(
+        The statistics are not fetched when fetch_stats is False, for example
+        when they have been loaded together with the row.
+        '''
+        if fetch_stats and self.id:
+            with database.session_scope() as db_session:
+                partner_row = db_session.query(PartnerRow).get(self.id)
+
+                if partner_row:
+                    self._set_stats(partner_row)
+
+
+    def _set_stats(self, row:PartnerRow):
+        '''Sets the statistics from the aggregates stored in a PartnerRow'''
+        self.review_count = row.review_count or 0
+        self.average_rating = (
+            row.rating_sum / row.review_count
+            if row.review_count else 0
+        )
+        self.query_count = row.query_count or 0
+
+
+    @classmethod
+    def _get_stats_columns(cls, partner_id) -> dict:
+        '''Returns the stored aggregates as computed from the relations.
+
+        ARGS:
+            partner_id: The Partner id, or the PartnerRow.id column to correlate
+            the aggregates with a PartnerRow query or update.
+
+        RETURNS:
+            columns: The rating_sum, review_count and query_count columns.
+        '''
+        return {
+            'rating_sum': select(func.coalesce(func.sum(ReviewRow.rating), 0))
+                .where(ReviewRow.partner_id == partner_id)
+                .scalar_subquery(),
+            'review_count': select(func.count(ReviewRow.id))
+                .where(ReviewRow.partner_id == partner_id)
+                .scalar_subquery(),
+            'query_count': select(func.count(QueryPartnerRow.id))
+                .where(QueryPartnerRow.partner_id == partner_id)
+                .scalar_subquery()
+        }
+
+
+    @classmethod
+    def repair_stats(cls) -> int:
+        '''Recomputes the stored aggregates of all the PartnerRows in bulk.
+
+        RETURNS:
+            count: The amount of PartnerRows updated.
+        '''
+        with database.session_scope() as db_session:
+            count = (
                 db_session
-                .query(QueryPartnerRow)
-                .filter_by(partner_id=self.id)
-                .all()
+                .query(PartnerRow)
+                .update(
+                    Partner._get_stats_columns(PartnerRow.id),
+                    synchronize_session=False
+                )
             )
-            
-            db_session.close()
+
+        return count
 
 
     @classmethod
@@ -138,7 +192,7 @@ class Partner:
     @classmethod
     def _from_row(cls, row:PartnerRow):
         '''Returns a Partner object obtained from a PartnerRow object'''
-        return Partner(
+        partner = Partner(
             id=row.id,
             created=time.localize_datetime(row.created),
             updated=time.localize_datetime(row.updated),
@@ -147,8 +201,12 @@ class Partner:
                 lat=row.location_lat,
                 lng=row.location_lng
             ),
-            types=row.types
+            types=row.types,
+            fetch_stats=False
         )
+        partner._set_stats(row)
+
+        return partner
 
 
     def _to_row(self) -> PartnerRow:
@@ -168,14 +226,13 @@ class Partner:
         '''Insert the Partner row in the database'''
         partner_row = self._to_row()
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(partner_row)
             db_session.flush()
             partner_id = partner_row.id
         
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             partner_row = db_session.query(PartnerRow).get(partner_id)
-            db_session.close()
         
         self.id = partner_row.id
         self.created = time.localize_datetime(partner_row.created)
@@ -187,7 +244,7 @@ class Partner:
     def _update_row(self) -> int:
         '''Update the Partner row in the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 partner_row = db_session.query(PartnerRow).get(self.id)
 
                 partner_row.updated = datetime.utcnow()
@@ -206,8 +263,9 @@ class Partner:
     def _delete_row(self) -> bool:
         '''Delete the Partner row from the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 partner_row = db_session.query(PartnerRow).get(self.id)
+                Review._remove_from_aggregates(db_session, partner_row.reviews)
                 db_session.delete(partner_row)
                 db_session.flush()
             
@@ -228,23 +286,49 @@ class Partner:
     @classmethod
     def get_from_id(cls, id:int):
         '''Returns a Partner object obtained from a PartnerRow id'''
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             partner_row = db_session.query(PartnerRow).get(id)
             partner = Partner._from_row(partner_row) if partner_row else None
-            
-            db_session.close()
         
         return partner
-        
-    
+
+
     @classmethod
-    def get_all(cls, filter_by:dict={}):
-        '''Returns all Partner objects from the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            rows = db_session.query(PartnerRow).filter_by(**filter_by).all()
+    def get_many(cls, ids:list):
+        '''Returns the Partner objects of a list of ids, in the same order.
+
+        The rows are loaded with one IN statement per chunk of ids, None
+        replaces the ids not found.
+        '''
+        partners = {}
+
+        with database.session_scope() as db_session:
+            for chunk in database.chunk_ids(ids):
+                rows = (
+                    db_session
+                    .query(PartnerRow)
+                    .filter(PartnerRow.id.in_(chunk))
+                )
+                partners.update({
+                    row.id: Partner._from_row(row) for row in rows
+                })
+
+        return [partners.get(int(id)) for id in ids]
+
+
+    @classmethod
+    def get_all(cls, filter_by:dict={}, limit:int=None, after:int=None):
+        '''Returns all Partner objects from the database with optional filters.
+
+        ARGS:
+            filter_by: The column values to filter the rows.
+            limit: The maximum amount of objects, see database.paginate.
+            after: The id after which the objects start.
+        '''
+        with database.session_scope() as db_session:
+            query = db_session.query(PartnerRow).filter_by(**filter_by)
+            rows = database.paginate(query, PartnerRow.id, limit, after).all()
             partners = [Partner._from_row(row) for row in rows]
-            
-            db_session.close()
         
         return partners
     
@@ -252,11 +336,12 @@ class Partner:
     @classmethod
     def get_count(cls, filter_by:dict={}):
         '''Counts all Partner objects in the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            count = len(
-                db_session.query(PartnerRow).filter_by(**filter_by).all()
+        with database.session_scope() as db_session:
+            count = (
+                db_session
+                .query(func.count(PartnerRow.id))
+                .filter_by(**filter_by)
+                .scalar()
             )
-            
-            db_session.close()
         
         return count
\ No newline at end of file
@@ -1,7 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, InitVar
 from datetime import datetime, timedelta
 from random import randint
-import statistics
 from typing import List
 
 from sqlalchemy import Column as ORMColumn
@@ -11,10 +10,11 @@ from sqlalchemy import Float as ORMFloat
 from sqlalchemy import DateTime as ORMDateTime
 from sqlalchemy import Interval as ORMInterval
 from sqlalchemy import PickleType as ORMPickleType
+from sqlalchemy import func, select
 from sqlalchemy.orm import relationship
 
 from .location import Location
-from .review import Review
+from .review import Review, ReviewRow
 from .relations import QueryPlaceRow
 from utils import time
 from utils.faker import faker
@@ -38,6 +38,9 @@ class PlaceRow(database.Base):
     duration = ORMColumn(ORMInterval)
     distance = ORMColumn(ORMInteger)
     types = ORMColumn(ORMPickleType)
+    rating_sum = ORMColumn(ORMInteger, default=0)
+    review_count = ORMColumn(ORMInteger, default=0)
+    query_count = ORMColumn(ORMInteger, default=0)
 
     query_relations = relationship('QueryPlaceRow', cascade='delete')
     reviews = relationship('ReviewRow', cascade='delete')
@@ -63,6 +66,7 @@ class Place:
         review_count: The amount of reviews received.
         average_rating: The average rating obtained from reviews.
         query_count: The amount of query relations.
+        fetch_stats: If the statistics have to be fetched from the database.
     '''
     name:str
     location:Location
@@ -79,25 +83,75 @@ class Place:
     created:datetime=None
     updated:datetime=None
 
+    fetch_stats:InitVar[bool]=True
 
-    def __post_init__(self):
-        '''Get additional data from database relations'''
-        reviews = Review.get_all(filter_by={'place_id': self.id})
 
-        self.review_count = len(reviews)
-        self.average_rating = statistics.mean([
-            review.rating for review in reviews
-        ]) if reviews else 0
+    def __post_init__(self, fetch_stats:bool):
+        '''Get additional data from database relations.
 
-        with database.create_session().begin() as db_session:
-            self.query_count = len(
+        The statistics are not fetched when fetch_stats is False, for example
+        when they have been loaded together with the row.
+        '''
+        if fetch_stats and self.id:
+            with database.session_scope() as db_session:
+                place_row = db_session.query(PlaceRow).get(self.id)
+
+                if place_row:
+                    self._set_stats(place_row)
+
+
+    def _set_stats(self, row:PlaceRow):
+        '''Sets the statistics from the aggregates stored in a PlaceRow'''
+        self.review_count = row.review_count or 0
+        self.average_rating = (
+            row.rating_sum / row.review_count
+            if row.review_count else 0
+        )
+        self.query_count = row.query_count or 0
+
+
+    @classmethod
+    def _get_stats_columns(cls, place_id) -> dict:
+        '''Returns the stored aggregates as computed from the relations.
+
+        ARGS:
+            place_id: The Place id, or the PlaceRow.id column to correlate
+            the aggregates with a PlaceRow query or update.
+
+        RETURNS:
+            columns: The rating_sum, review_count and query_count columns.
+        '''
+        return {
+            'rating_sum': select(func.coalesce(func.sum(ReviewRow.rating), 0))
+                .where(ReviewRow.place_id == place_id)
+                .scalar_subquery(),
+            'review_count': select(func.count(ReviewRow.id))
+                .where(ReviewRow.place_id == place_id)
+                .scalar_subquery(),
+            'query_count': select(func.count(QueryPlaceRow.id))
+                .where(QueryPlaceRow.place_id == place_id)
+                .scalar_subquery()
+        }
+
+
+    @classmethod
+    def repair_stats(cls) -> int:
+        '''Recomputes the stored aggregates of all the PlaceRows in bulk.
+
+        RETURNS:
+            count: The amount of PlaceRows updated.
+        '''
+        with database.session_scope() as db_session:
+            count = (
                 db_session
-                .query(QueryPlaceRow)
-                .filter_by(place_id=self.id)
-                .all()
+                .query(PlaceRow)
+                .update(
+                    Place._get_stats_columns(PlaceRow.id),
+                    synchronize_session=False
+                )
             )
-            
-            db_session.close()
+
+        return count
 
 
     @classmethod
@@ -158,7 +212,7 @@ class Place:
     @classmethod
     def _from_row(cls, row:PlaceRow):
         '''Returns a Place object obtained from a PlaceRow object'''
-        return Place(
+        place = Place(
             id=row.id,
             created=time.localize_datetime(row.created),
             updated=time.localize_datetime(row.updated),
@@ -170,8 +224,12 @@ class Place:
             difficulty=row.difficulty,
             duration=row.duration,
             distance=row.distance,
-            types=row.types
+            types=row.types,
+            fetch_stats=False
         )
+        place._set_stats(row)
+
+        return place
     
 
     def _to_row(self) -> PlaceRow:
@@ -194,14 +252,13 @@ class Place:
         '''Insert the Place row in the database'''
         place_row = self._to_row()
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(place_row)
             db_session.flush()
             place_id = place_row.id
         
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             place_row = db_session.query(PlaceRow).get(place_id)
-            db_session.close()
         
         self.id = place_row.id
         self.created = time.localize_datetime(place_row.created)
@@ -213,7 +270,7 @@ class Place:
     def _update_row(self) -> int:
         '''Update the Place row in the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 place_row = db_session.query(PlaceRow).get(self.id)
 
                 place_row.updated = datetime.utcnow()
@@ -235,8 +292,9 @@ class Place:
     def _delete_row(self) -> bool:
         '''Delete the Place row from the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 place_row = db_session.query(PlaceRow).get(self.id)
+                Review._remove_from_aggregates(db_session, place_row.reviews)
                 db_session.delete(place_row)
                 db_session.flush()
             
@@ -258,23 +316,49 @@ class Place:
     @classmethod
     def get_from_id(cls, id:int):
         '''Returns a Place object obtained from a PlaceRow id'''
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             place_row = db_session.query(PlaceRow).get(id)
             place = Place._from_row(place_row) if place_row else None
-            
-            db_session.close()
         
         return place
-    
+
+
+    @classmethod
+    def get_many(cls, ids:list):
+        '''Returns the Place objects of a list of ids, in the same order.
+
+        The rows are loaded with one IN statement per chunk of ids, None
+        replaces the ids not found.
+        '''
+        places = {}
+
+        with database.session_scope() as db_session:
+            for chunk in database.chunk_ids(ids):
+                rows = (
+                    db_session
+                    .query(PlaceRow)
+                    .filter(PlaceRow.id.in_(chunk))
+                )
+                places.update({
+                    row.id: Place._from_row(row) for row in rows
+                })
+
+        return [places.get(int(id)) for id in ids]
+
 
     @classmethod
-    def get_all(cls, filter_by:dict={}):
-        '''Returns all Place objects from the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            rows = db_session.query(PlaceRow).filter_by(**filter_by).all()
+    def get_all(cls, filter_by:dict={}, limit:int=None, after:int=None):
+        '''Returns all Place objects from the database with optional filters.
+
+        ARGS:
+            filter_by: The column values to filter the rows.
+            limit: The maximum amount of objects, see database.paginate.
+            after: The id after which the objects start.
+        '''
+        with database.session_scope() as db_session:
+            query = db_session.query(PlaceRow).filter_by(**filter_by)
+            rows = database.paginate(query, PlaceRow.id, limit, after).all()
             places = [Place._from_row(row) for row in rows]
-            
-            db_session.close()
         
         return places
     
@@ -282,11 +366,12 @@ class Place:
     @classmethod
     def get_count(cls, filter_by:dict={}):
         '''Counts all Place objects in the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            count = len(
-                db_session.query(PlaceRow).filter_by(**filter_by).all()
+        with database.session_scope() as db_session:
+            count = (
+                db_session
+                .query(func.count(PlaceRow.id))
+                .filter_by(**filter_by)
+                .scalar()
             )
-            
-            db_session.close()
         
         return count
\ No newline at end of file
@@ -13,7 +13,9 @@ from sqlalchemy import DateTime as ORMDateTime
 from sqlalchemy import Interval as ORMInterval
 from sqlalchemy import PickleType as ORMPickleType
 from sqlalchemy import ForeignKey
+from sqlalchemy import func
 from sqlalchemy.orm import relationship
+from werkzeug.exceptions import BadRequest
 
 from .location import Location
 from .interval import Interval
@@ -69,6 +71,9 @@ class Query:
         weather_ids: The forecasts accepted for the query.
         max_results: The maximum amount of results to get.
         language: The language to use in results.
+        deadline_ms: The time budget of the search in milliseconds, no limit
+                     if None. It only applies to the execution, it is not
+                     stored.
         favorited: If the user has set the query as a favorite.
         user_id: The user id of the author.
     '''
@@ -82,6 +87,7 @@ class Query:
     favorited:bool=False
     max_results:int=10
     language:str=None
+    deadline_ms:int=None
     
     user_id:int=None
 
@@ -136,9 +142,42 @@ class Query:
         )
 
 
+    @classmethod
+    def _parse_deadline_ms(cls, value) -> int:
+        '''Parses a time budget in milliseconds.
+
+        ARGS:
+            value: The deadline_ms of a request, an integer or a string.
+
+        RETURNS:
+            deadline_ms: The time budget, None if missing.
+
+        RAISES:
+            BadRequest: If the value is not a non-negative integer.
+        '''
+        if value is None:
+            return None
+
+        if isinstance(value, int) and not isinstance(value, bool):
+            deadline_ms = value
+        elif isinstance(value, str) and value.isdigit():
+            deadline_ms = int(value)
+        else:
+            deadline_ms = -1
+
+        if deadline_ms < 0:
+            raise BadRequest('deadline_ms must be a non-negative integer')
+
+        return deadline_ms
+
+
     @classmethod
     def from_dict(cls, dictionary:dict):
-        '''Creates and returns a Query object from a dictionary'''
+        '''Creates and returns a Query object from a dictionary.
+
+        RAISES:
+            BadRequest: If the deadline_ms is not a non-negative integer.
+        '''
         return Query(
             id=dictionary['id']
                 if 'id' in dictionary else None,
@@ -169,6 +208,7 @@ class Query:
                 if 'max_results' in dictionary else cls.max_results,
             language=dictionary['language']
                 if 'language' in dictionary else cls.language,
+            deadline_ms=cls._parse_deadline_ms(dictionary.get('deadline_ms')),
             favorited=dictionary['favorited']
                 if 'favorited' in dictionary else None,
             user_id=dictionary['user_id']
@@ -229,14 +269,13 @@ class Query:
         '''Insert the Query row in the database'''
         query_row = self._to_row()
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(query_row)
             db_session.flush()
             query_id = query_row.id
         
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             query_row = db_session.query(QueryRow).get(query_id)
-            db_session.close()
         
         self.id = query_row.id
         self.created = time.localize_datetime(query_row.created)
@@ -248,7 +287,7 @@ class Query:
     def _update_row(self) -> int:
         '''Update the Query row in the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 query_row = db_session.query(QueryRow).get(self.id)
 
                 query_row.updated = datetime.utcnow()
@@ -276,8 +315,25 @@ class Query:
     def _delete_row(self) -> bool:
         '''Delete the Query row from the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 query_row = db_session.query(QueryRow).get(self.id)
+
+                for relation in query_row.place_relations:
+                    database.increment(
+                        db_session,
+                        'place',
+                        relation.place_id,
+                        query_count=-1
+                    )
+
+                for relation in query_row.partner_relations:
+                    database.increment(
+                        db_session,
+                        'partner',
+                        relation.partner_id,
+                        query_count=-1
+                    )
+
                 db_session.delete(query_row)
                 db_session.flush()
             
@@ -299,23 +355,49 @@ class Query:
     @classmethod
     def get_from_id(cls, id:int):
         '''Returns a Query object obtained from a QueryRow id'''
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             query_row = db_session.query(QueryRow).get(id)
             query = Query._from_row(query_row) if query_row else None
-            
-            db_session.close()
         
         return query
-    
+
+
+    @classmethod
+    def get_many(cls, ids:list):
+        '''Returns the Query objects of a list of ids, in the same order.
+
+        The rows are loaded with one IN statement per chunk of ids, None
+        replaces the ids not found.
+        '''
+        queries = {}
+
+        with database.session_scope() as db_session:
+            for chunk in database.chunk_ids(ids):
+                rows = (
+                    db_session
+                    .query(QueryRow)
+                    .filter(QueryRow.id.in_(chunk))
+                )
+                queries.update({
+                    row.id: Query._from_row(row) for row in rows
+                })
+
+        return [queries.get(int(id)) for id in ids]
+
 
     @classmethod
-    def get_all(cls, filter_by:dict={}):
-        '''Returns all Query objects from the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            rows = db_session.query(QueryRow).filter_by(**filter_by).all()
+    def get_all(cls, filter_by:dict={}, limit:int=None, after:int=None):
+        '''Returns all Query objects from the database with optional filters.
+
+        ARGS:
+            filter_by: The column values to filter the rows.
+            limit: The maximum amount of objects, see database.paginate.
+            after: The id after which the objects start.
+        '''
+        with database.session_scope() as db_session:
+            query = db_session.query(QueryRow).filter_by(**filter_by)
+            rows = database.paginate(query, QueryRow.id, limit, after).all()
             queries = [Query._from_row(row) for row in rows]
-            
-            db_session.close()
         
         return queries
     
@@ -323,12 +405,13 @@ class Query:
     @classmethod
     def get_count(cls, filter_by:dict={}):
         '''Counts all Query objects in the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            count = len(
-                db_session.query(QueryRow).filter_by(**filter_by).all()
+        with database.session_scope() as db_session:
+            count = (
+                db_session
+                .query(func.count(QueryRow.id))
+                .filter_by(**filter_by)
+                .scalar()
             )
-            
-            db_session.close()
         
         return count
 
@@ -340,11 +423,13 @@ class Query:
             place_id=place_id
         )
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(query_place_row)
             db_session.flush()
             query_place_row_id = query_place_row.id
 
+            database.increment(db_session, 'place', place_id, query_count=1)
+
         return query_place_row_id
     
 
@@ -355,11 +440,13 @@ class Query:
             partner_id=partner_id
         )
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(query_partner_row)
             db_session.flush()
             query_partner_row_id = query_partner_row.id
 
+            database.increment(db_session, 'partner', partner_id, query_count=1)
+
         return query_partner_row_id
     
 
@@ -368,7 +455,7 @@ class Query:
         place_ids = []
 
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 query_place_rows = db_session.query(QueryPlaceRow).filter_by(
                     query_id=self.id
                 ).all()
@@ -377,8 +464,6 @@ class Query:
                     query_place_row.place_id
                     for query_place_row in query_place_rows
                 ]
-                
-                db_session.close()
         
         return place_ids
 
@@ -388,7 +473,7 @@ class Query:
         partner_ids = []
 
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 query_partner_rows = db_session.query(QueryPartnerRow).filter_by(
                     query_id=self.id
                 ).all()
@@ -397,7 +482,5 @@ class Query:
                     query_partner_row.partner_id
                     for query_partner_row in query_partner_rows
                 ]
-                
-                db_session.close()
         
         return partner_ids
\ No newline at end of file
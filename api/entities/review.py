@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, InitVar
 from datetime import datetime
 from random import randint, randrange
 
@@ -7,9 +7,10 @@ from sqlalchemy import DateTime as ORMDateTime
 from sqlalchemy import Integer as ORMInteger
 from sqlalchemy import String as ORMString
 from sqlalchemy import ForeignKey
+from sqlalchemy import func
 from sqlalchemy.orm import relationship
 
-from entities.user import User
+from entities.user import User, UserRow
 from services import database
 from utils import time
 from utils.faker import faker
@@ -61,6 +62,10 @@ class Review:
         parent_id: The parent review id if this review is a reply to it.
         partner_id: The id of the partner to which the review refers.
         place_id: The id of the place to which the review refers.
+        user_name: The name of the author.
+        partner_name: The name of the partner to which the review refers.
+        place_name: The name of the place to which the review refers.
+        fetch_names: If the author name has to be fetched from the database.
     '''
     rating:int
     comment:str=''
@@ -71,15 +76,23 @@ class Review:
     place_id:int=None
 
     user_name:str=''
+    partner_name:str=''
+    place_name:str=''
 
     id:int=None
     created:datetime=None
     updated:datetime=None
 
+    fetch_names:InitVar[bool]=True
 
-    def __post_init__(self):
-        '''Get additional data from database relations'''
-        if self.user_id:
+
+    def __post_init__(self, fetch_names:bool):
+        '''Get additional data from database relations.
+
+        The names are not fetched when fetch_names is False, for example when
+        they have been loaded with the review rows.
+        '''
+        if fetch_names and self.user_id:
             self.user_name = User.get_from_id(self.user_id).name
 
 
@@ -125,7 +138,13 @@ class Review:
 
 
     @classmethod
-    def _from_row(cls, row:ReviewRow):
+    def _from_row(
+        cls,
+        row:ReviewRow,
+        user_name:str=None,
+        partner_name:str=None,
+        place_name:str=None
+    ):
         '''Returns a Review object obtained from a ReviewRow object'''
         return Review(
             id=row.id,
@@ -136,7 +155,48 @@ class Review:
             user_id=row.user_id,
             parent_id=row.parent_id,
             partner_id=row.partner_id,
-            place_id=row.place_id
+            place_id=row.place_id,
+            user_name=user_name or '',
+            partner_name=partner_name or '',
+            place_name=place_name or '',
+            fetch_names=False
+        )
+
+
+    @classmethod
+    def _query_with_names(cls, db_session, filter_by:dict={}):
+        '''Queries the review rows along with the related names.
+
+        The author, partner and place names are joined in the same statement,
+        so listing reviews costs one round trip whatever their amount.
+
+        ARGS:
+            db_session: The database session.
+            filter_by: The filters on the review rows.
+
+        RETURNS:
+            query: The query of (ReviewRow, user, partner, place name) tuples.
+        '''
+        # The tables avoid circular imports with the Place and Partner rows
+        partner_table = database.Base.metadata.tables['partner']
+        place_table = database.Base.metadata.tables['place']
+
+        # filter_by applies to the latest joined entity, so it comes first
+        return (
+            db_session
+            .query(
+                ReviewRow,
+                UserRow.name,
+                partner_table.c.name,
+                place_table.c.name
+            )
+            .filter_by(**filter_by)
+            .outerjoin(UserRow, UserRow.id == ReviewRow.user_id)
+            .outerjoin(
+                partner_table,
+                partner_table.c.id == ReviewRow.partner_id
+            )
+            .outerjoin(place_table, place_table.c.id == ReviewRow.place_id)
         )
 
 
@@ -155,18 +215,66 @@ class Review:
         )
 
 
+    @classmethod
+    def _adjust_aggregates(cls, db_session, review_row:ReviewRow, sign:int):
+        '''Adds or removes a review from its place and partner aggregates.
+
+        ARGS:
+            db_session: The database session.
+            review_row: The ReviewRow to add or remove.
+            sign: 1 to add the review, -1 to remove it.
+        '''
+        for table_name, row_id in [
+            ('place', review_row.place_id),
+            ('partner', review_row.partner_id)
+        ]:
+            if row_id:
+                database.increment(
+                    db_session,
+                    table_name,
+                    row_id,
+                    rating_sum=sign * (review_row.rating or 0),
+                    review_count=sign
+                )
+
+
+    @classmethod
+    def _remove_from_aggregates(cls, db_session, review_rows:list):
+        '''Removes reviews about to be deleted from the aggregates.
+
+        The replies deleted in cascade are removed too, each review once.
+
+        ARGS:
+            db_session: The database session.
+            review_rows: The ReviewRows about to be deleted.
+        '''
+        removed_ids = set()
+        pending_rows = list(review_rows)
+
+        while pending_rows:
+            review_row = pending_rows.pop()
+
+            if review_row.id not in removed_ids:
+                removed_ids.add(review_row.id)
+                Review._adjust_aggregates(db_session, review_row, -1)
+
+                # The 'parent' relationship holds the replies
+                pending_rows.extend(review_row.parent)
+
+
     def _insert_row(self) -> int:
         '''Insert the Review row in the database'''
         review_row = self._to_row()
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(review_row)
             db_session.flush()
             review_id = review_row.id
+
+            Review._adjust_aggregates(db_session, review_row, 1)
         
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             review_row = db_session.query(ReviewRow).get(review_id)
-            db_session.close()
         
         self.id = review_row.id
         self.created = time.localize_datetime(review_row.created)
@@ -178,8 +286,9 @@ class Review:
     def _update_row(self) -> int:
         '''Update the Review row in the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 review_row = db_session.query(ReviewRow).get(self.id)
+                Review._adjust_aggregates(db_session, review_row, -1)
 
                 review_row.updated = datetime.utcnow()
                 review_row.rating = self.rating
@@ -190,6 +299,7 @@ class Review:
                 review_row.place_id = self.place_id
 
                 db_session.flush()
+                Review._adjust_aggregates(db_session, review_row, 1)
                 
             return self.id
         
@@ -199,8 +309,9 @@ class Review:
     def _delete_row(self) -> bool:
         '''Delete the Review row from the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 review_row = db_session.query(ReviewRow).get(self.id)
+                Review._remove_from_aggregates(db_session, [review_row])
                 db_session.delete(review_row)
                 db_session.flush()
             
@@ -221,23 +332,59 @@ class Review:
     @classmethod
     def get_from_id(cls, id:int):
         '''Returns a Review object obtained from a ReviewRow id'''
-        with database.create_session().begin() as db_session:
-            review_row = db_session.query(ReviewRow).get(id)
-            review = Review._from_row(review_row) if review_row else None
-            
-            db_session.close()
+        with database.session_scope() as db_session:
+            result = (
+                Review._query_with_names(db_session, {'id': id})
+                .one_or_none()
+            )
+            review = Review._from_row(*result) if result else None
         
         return review
 
-    
+
     @classmethod
-    def get_all(cls, filter_by:dict={}):
-        '''Returns all Review objects from the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            rows = db_session.query(ReviewRow).filter_by(**filter_by).all()
-            reviews = [Review._from_row(row) for row in rows]
-            
-            db_session.close()
+    def get_many(cls, ids:list):
+        '''Returns the Review objects of a list of ids, in the same order.
+
+        The rows and their names are loaded with one IN statement per chunk
+        of ids, None replaces the ids not found.
+        '''
+        reviews = {}
+
+        with database.session_scope() as db_session:
+            for chunk in database.chunk_ids(ids):
+                results = (
+                    Review._query_with_names(db_session)
+                    .filter(ReviewRow.id.in_(chunk))
+                )
+                reviews.update({
+                    result[0].id: Review._from_row(*result)
+                    for result in results
+                })
+
+        return [reviews.get(int(id)) for id in ids]
+
+
+    @classmethod
+    def get_all(cls, filter_by:dict={}, limit:int=None, after:int=None):
+        '''Returns all Review objects from the database with optional filters.
+
+        The author, partner and place names are loaded in the same statement.
+
+        ARGS:
+            filter_by: The column values to filter the rows.
+            limit: The maximum amount of objects, see database.paginate.
+            after: The id after which the objects start.
+        '''
+        with database.session_scope() as db_session:
+            query = Review._query_with_names(db_session, filter_by)
+            results = database.paginate(
+                query,
+                ReviewRow.id,
+                limit,
+                after
+            ).all()
+            reviews = [Review._from_row(*result) for result in results]
         
         return reviews
     
@@ -245,11 +392,12 @@ class Review:
     @classmethod
     def get_count(cls, filter_by:dict={}):
         '''Counts all Review objects in the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            count = len(
-                db_session.query(ReviewRow).filter_by(**filter_by).all()
+        with database.session_scope() as db_session:
+            count = (
+                db_session
+                .query(func.count(ReviewRow.id))
+                .filter_by(**filter_by)
+                .scalar()
             )
-            
-            db_session.close()
         
         return count
\ No newline at end of file
@@ -9,6 +9,7 @@ from sqlalchemy import Float as ORMFloat
 from sqlalchemy import DateTime as ORMDateTime
 from sqlalchemy import PickleType as ORMPickleType
 from sqlalchemy import ForeignKey
+from sqlalchemy import func
 from sqlalchemy.orm import relationship
 
 from .location import Location
@@ -209,8 +210,11 @@ class Solution:
 
     @property
     def free_time(self) -> timedelta:
-        '''Calculate the free time remaining'''
-        place = Place.get_from_id(self.place_id) if self.place_id else None
+        '''Calculate the free time remaining, with the place if loaded'''
+        place = self.place
+
+        if place is None and self.place_id:
+            place = Place.get_from_id(self.place_id)
 
         place_duration = (
             place.duration
@@ -272,8 +276,11 @@ class Solution:
 
 
     @classmethod
-    def _from_row(cls, row:SolutionRow):
-        '''Returns a Solution object obtained from a SolutionRow object'''
+    def _from_row(cls, row:SolutionRow, place:Place=None):
+        '''Returns a Solution object obtained from a SolutionRow object.
+
+        Giving the place already loaded avoids its lookup for the info.
+        '''
         return Solution(
             id=row.id,
             created=time.localize_datetime(row.created),
@@ -291,9 +298,29 @@ class Solution:
             forecasts=row.forecasts,
             query_id=row.query_id,
             place_id=row.place_id,
-            user_id=row.user_id
+            user_id=row.user_id,
+            place=place
         )
 
+
+    @classmethod
+    def _from_rows(cls, rows:List[SolutionRow]) -> list:
+        '''Returns the Solution objects of rows, with their places.
+
+        The places are loaded with Place.get_many, not one by one.
+        '''
+        place_ids = list({row.place_id for row in rows if row.place_id})
+        places = {
+            place.id: place
+            for place in Place.get_many(place_ids)
+            if place
+        }
+
+        return [
+            Solution._from_row(row, places.get(row.place_id))
+            for row in rows
+        ]
+
     
     def _to_row(self) -> SolutionRow:
         '''Returns a SolutionRow object obtained from a Solution object'''
@@ -318,14 +345,13 @@ class Solution:
         '''Insert the Solution row in the database'''
         solution_row = self._to_row()
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(solution_row)
             db_session.flush()
             solution_id = solution_row.id
         
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             solution_row = db_session.query(SolutionRow).get(solution_id)
-            db_session.close()
         
         self.id = solution_row.id
         self.created = time.localize_datetime(solution_row.created)
@@ -337,7 +363,7 @@ class Solution:
     def _update_row(self) -> int:
         '''Update the Solution row in the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 solution_row = db_session.query(SolutionRow).get(self.id)
 
                 solution_row.updated = datetime.utcnow()
@@ -362,7 +388,7 @@ class Solution:
     def _delete_row(self) -> bool:
         '''Delete the Solution row from the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 solution_row = db_session.query(SolutionRow).get(self.id)
                 db_session.delete(solution_row)
                 db_session.flush()
@@ -385,23 +411,90 @@ class Solution:
     @classmethod
     def get_from_id(cls, id:int):
         '''Returns a Solution object obtained from a SolutionRow id'''
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             solution_row = db_session.query(SolutionRow).get(id)
             query = Solution._from_row(solution_row) if solution_row else None
-            
-            db_session.close()
         
         return query
-    
+
 
     @classmethod
-    def get_all(cls, filter_by:dict={}):
-        '''Returns all Solution objects from the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            rows = db_session.query(SolutionRow).filter_by(**filter_by).all()
-            solutions = [Solution._from_row(row) for row in rows]
-            
-            db_session.close()
+    def get_many(cls, ids:list):
+        '''Returns the Solution objects of a list of ids, in the same order.
+
+        The rows are loaded with one IN statement per chunk of ids, None
+        replaces the ids not found.
+        '''
+        rows = []
+
+        with database.session_scope() as db_session:
+            for chunk in database.chunk_ids(ids):
+                rows.extend(
+                    db_session
+                    .query(SolutionRow)
+                    .filter(SolutionRow.id.in_(chunk))
+                )
+
+            solutions = {
+                solution.id: solution
+                for solution in Solution._from_rows(rows)
+            }
+
+        return [solutions.get(int(id)) for id in ids]
+
+
+    @classmethod
+    def attach_places(cls, solutions:list, places:list=[]) -> list:
+        '''Sets the place of a list of Solution objects.
+
+        ARGS:
+            solutions: The Solution objects.
+            places: The Place objects already loaded, the others are loaded
+                    with Place.get_many.
+
+        RETURNS:
+            solutions: The same Solution objects, with their place.
+        '''
+        places = {
+            **{
+                solution.place.id: solution.place
+                for solution in solutions
+                if solution.place is not None
+            },
+            **{place.id: place for place in places}
+        }
+        missing_ids = [
+            solution.place_id
+            for solution in solutions
+            if solution.place_id not in places
+        ]
+
+        if missing_ids:
+            places.update({
+                place.id: place
+                for place in Place.get_many(missing_ids)
+                if place
+            })
+
+        for solution in solutions:
+            solution.place = places.get(solution.place_id)
+
+        return solutions
+
+
+    @classmethod
+    def get_all(cls, filter_by:dict={}, limit:int=None, after:int=None):
+        '''Returns all Solution objects from the database with optional filters.
+
+        ARGS:
+            filter_by: The column values to filter the rows.
+            limit: The maximum amount of objects, see database.paginate.
+            after: The id after which the objects start.
+        '''
+        with database.session_scope() as db_session:
+            query = db_session.query(SolutionRow).filter_by(**filter_by)
+            rows = database.paginate(query, SolutionRow.id, limit, after).all()
+            solutions = Solution._from_rows(rows)
         
         return solutions
     
@@ -409,12 +502,13 @@ class Solution:
     @classmethod
     def get_count(cls, filter_by:dict={}):
         '''Counts all Solution objects in the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            count = len(
-                db_session.query(SolutionRow).filter_by(**filter_by).all()
+        with database.session_scope() as db_session:
+            count = (
+                db_session
+                .query(func.count(SolutionRow.id))
+                .filter_by(**filter_by)
+                .scalar()
             )
-            
-            db_session.close()
         
         return count
 
@@ -426,7 +520,7 @@ class Solution:
             partner_id=partner_id
         )
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(solution_partner_row)
             db_session.flush()
             solution_partner_row_id = solution_partner_row.id
@@ -439,7 +533,7 @@ class Solution:
         partner_ids = []
 
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 solution_partner_rows = db_session.query(
                     SolutionPartnerRow
                 ).filter_by(
@@ -450,7 +544,5 @@ class Solution:
                     solution_partner_row.partner_id
                     for solution_partner_row in solution_partner_rows
                 ]
-                
-                db_session.close()
         
         return partner_ids
\ No newline at end of file
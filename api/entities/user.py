@@ -9,6 +9,7 @@ from sqlalchemy import Integer as ORMInteger
 from sqlalchemy import String as ORMString
 from sqlalchemy import Boolean as ORMBoolean
 from sqlalchemy import ForeignKey
+from sqlalchemy import func
 from sqlalchemy.orm import relationship
 from werkzeug import security
 import flask_jwt_extended as flask_jwt
@@ -149,14 +150,13 @@ class User:
 
         user_row = self._to_row()
 
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             db_session.add(user_row)
             db_session.flush()
             user_id = user_row.id
         
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             user_row = db_session.query(UserRow).get(user_id)
-            db_session.close()
         
         self.id = user_row.id
         self.created = time.localize_datetime(user_row.created)
@@ -168,7 +168,7 @@ class User:
     def _update_row(self) -> int:
         '''Update the User row in the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 user_row = db_session.query(UserRow).get(self.id)
 
                 if self.password and not self.check_password(user_row.password):
@@ -197,7 +197,7 @@ class User:
     def _delete_row(self) -> bool:
         '''Delete the User row from the database'''
         if self.id:
-            with database.create_session().begin() as db_session:
+            with database.session_scope() as db_session:
                 user_row = db_session.query(UserRow).get(self.id)
                 db_session.delete(user_row)
                 db_session.flush()
@@ -220,23 +220,49 @@ class User:
     @classmethod
     def get_from_id(cls, id:int):
         '''Returns a User object obtained from a UserRow id'''
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             user_row = db_session.query(UserRow).get(id)
             user = User._from_row(user_row) if user_row else None
-            
-            db_session.close()
         
         return user
-    
-    
+
+
     @classmethod
-    def get_all(cls, filter_by:dict={}):
-        '''Returns all User objects from the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            rows = db_session.query(UserRow).filter_by(**filter_by).all()
+    def get_many(cls, ids:list):
+        '''Returns the User objects of a list of ids, in the same order.
+
+        The rows are loaded with one IN statement per chunk of ids, None
+        replaces the ids not found.
+        '''
+        users = {}
+
+        with database.session_scope() as db_session:
+            for chunk in database.chunk_ids(ids):
+                rows = (
+                    db_session
+                    .query(UserRow)
+                    .filter(UserRow.id.in_(chunk))
+                )
+                users.update({
+                    row.id: User._from_row(row) for row in rows
+                })
+
+        return [users.get(int(id)) for id in ids]
+
+
+    @classmethod
+    def get_all(cls, filter_by:dict={}, limit:int=None, after:int=None):
+        '''Returns all User objects from the database with optional filters.
+
+        ARGS:
+            filter_by: The column values to filter the rows.
+            limit: The maximum amount of objects, see database.paginate.
+            after: The id after which the objects start.
+        '''
+        with database.session_scope() as db_session:
+            query = db_session.query(UserRow).filter_by(**filter_by)
+            rows = database.paginate(query, UserRow.id, limit, after).all()
             users = [User._from_row(row) for row in rows]
-            
-            db_session.close()
         
         return users
     
@@ -244,12 +270,13 @@ class User:
     @classmethod
     def get_count(cls, filter_by:dict={}):
         '''Counts all User objects in the database with optional filters'''
-        with database.create_session().begin() as db_session:
-            count = len(
-                db_session.query(UserRow).filter_by(**filter_by).all()
+        with database.session_scope() as db_session:
+            count = (
+                db_session
+                .query(func.count(UserRow.id))
+                .filter_by(**filter_by)
+                .scalar()
             )
-            
-            db_session.close()
         
         return count
 
@@ -278,13 +305,12 @@ class User:
         RETURNS:
             user: The User object or None if the User has not been found.
         '''
-        with database.create_session().begin() as db_session:
+        with database.session_scope() as db_session:
             user_row = db_session.query(UserRow).filter_by(
                 email=email
             ).first()
             
             user = User._from_row(user_row) if user_row else None
-            db_session.close()
         
         if user and user.check_password(password):
             return user
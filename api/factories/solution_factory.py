@@ -1,10 +1,50 @@
-from typing import List
+import os
+import time as timer
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator, List
 
-from services import geography, weather
+from dotenv import load_dotenv
+
+from services import geography, weather, place_index
 from entities.query import Query
 from entities.interval import Interval
 from entities.place import Place
 from entities.solution import Solution
+from utils import metrics
+from utils.concurrency import map_concurrently
+
+
+load_dotenv()
+concurrency = int(os.getenv('SEARCH_CONCURRENCY') or 8)
+deadline_margin = int(os.getenv('SEARCH_DEADLINE_MARGIN_MS') or 200) / 1000
+
+
+'''The maximum effective speeds in km/h, by Directions mode.
+
+They bound the distance covered in a given time, as the crow flies, so
+they must stay above the fastest realistic trip.
+'''
+max_speeds = {
+    mode: float(os.getenv(f"SEARCH_MAX_SPEED_{mode.upper()}") or default)
+    for mode, default in [
+        ('transit', 250),
+        ('driving', 130),
+        ('bicycling', 40),
+        ('walking', 7)
+    ]
+}
+
+
+'''The costs in seconds of the external API calls never measured'''
+DEFAULT_COSTS = {'directions': 0.5, 'weather': 0.3}
+
+
+'''The stage orders the factory can choose between'''
+PLANS = {
+    'itineraries_first': ['itineraries', 'trip_duration', 'forecasts'],
+    'forecasts_first': ['forecasts', 'itineraries', 'trip_duration']
+}
 
 
 class SolutionFactory:
@@ -12,11 +52,30 @@ class SolutionFactory:
     
     Attributes:
         query: The query to execute.
+        concurrency: The maximum amount of concurrent external API calls.
+        mode: The Directions mode of the itineraries.
+        pruned_count: The amount of places pruned before the Directions calls.
+        plan: The chosen stage order with its estimated costs and
+              selectivities, None before the stages run.
+        processed_count: The amount of places the streaming pipeline has
+                         run the stages on.
+        deadline: The monotonic time after which no external call starts,
+                  None without Query deadline_ms.
+        partial: If calls have been skipped because of the deadline.
+        timings: The time spent in each stage in seconds, by stage name.
     '''
-    def __init__(self, query:Query):
+    def __init__(self, query:Query, concurrency:int=concurrency):
         self._query = query
         self._places = []
         self._solutions = []
+        self.concurrency = concurrency
+        self.mode = 'transit'
+        self.pruned_count = 0
+        self.plan = None
+        self.processed_count = 0
+        self.deadline = None
+        self.partial = False
+        self.timings = {}
     
     @property
     def query(self) -> Query:
@@ -30,44 +89,200 @@ class SolutionFactory:
     def solutions(self) -> List[Solution]:
         return self._solutions
 
+    def _start_deadline(self):
+        '''Starts the Query time budget, if any'''
+        deadline_ms = self.query.deadline_ms
+
+        self.partial = False
+        self.timings = {}
+        self.deadline = (
+            timer.monotonic() + deadline_ms / 1000
+            if deadline_ms else None
+        )
+    
+    def _has_time_left(self) -> bool:
+        '''Checks if an external call can still start before the deadline.
+
+        The calls need SEARCH_DEADLINE_MARGIN_MS to return, so none starts
+        within the margin. A skipped call makes the solutions partial.
+        '''
+        if self.deadline is None:
+            return True
+
+        if timer.monotonic() + deadline_margin < self.deadline:
+            return True
+
+        self.partial = True
+        return False
+    
+    @contextmanager
+    def _time(self, stage:str):
+        '''Adds the duration of the block to the timing of a stage'''
+        start = timer.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            self.timings[stage] = (
+                self.timings.get(stage, 0)
+                + timer.perf_counter() - start
+            )
+    
+    def get_report(self) -> dict:
+        '''Gets the report of the last execution.
+
+        RETURNS:
+            report: If the solutions are partial and the time spent in each
+                    stage in milliseconds.
+        '''
+        return {
+            'partial': self.partial,
+            'timings': {
+                stage: round(seconds * 1000)
+                for stage, seconds in self.timings.items()
+            }
+        }
+    
     def _fetch_places(self):
         '''Makes a Place search within the Query radius.
 
         It searches the places of the chosen type inside the specified radius,
         around the location defined. Each Place is added to the 'places' list
-        attribute to go on with the solution list production.
+        attribute to go on with the solution list production. The database
+        places are found with the in-memory place index.
         '''
         query = self.query
         
-        self._places = geography.fetch_places_nearby(
-            location=query.location,
-            radius=query.radius,
-            types=query.types
-        )
+        if query.radius:
+            self._places = place_index.within_radius(
+                location=query.location,
+                radius=query.radius
+            )
+        else:
+            self._places = geography.fetch_places_nearby(
+                location=query.location,
+                radius=query.radius,
+                types=query.types
+            )
     
-    def _fetch_itineraries(self):
-        '''Gets the outward itinerary and the return itinerary for each Place.
+    def _prune_places(self):
+        '''Removes the places which cannot give a solution.
 
-        For each Place found, it searches the outward itinerary and the return
-        itinerary. Then, it creates a Solution object and assign to it the Place
-        and the two itineraries. If the Solution free time is positive, then it
-        appends the Solution to the 'solutions' list attribute.
+        The round trip to a place takes at least twice its great-circle
+        distance at the mode maximum speed. The places whose lower bound
+        exceeds the maximum walk plus travel durations, or doesn't leave
+        the place duration in the Query interval, are removed before their
+        two Directions calls. The avoided calls are counted.
         '''
         query = self.query
         places = self.places
-        
-        for place in places:
-            outward_itinerary = geography.fetch_itinerary(
-                start_location=query.location,
-                end_location=place.location,
-                departure_time=query.interval.start
-            )
+
+        if not places:
+            return
+
+        distances, in_radius, order = geography.get_distances(
+            query.location,
+            [(place.location.lat, place.location.lng) for place in places]
+        )
+        max_speed = max_speeds.get(self.mode, max_speeds['transit']) / 3.6
+        max_trip_duration = query.max_walk + query.max_travel
+
+        kept_places = []
+        for place, distance in zip(places, distances):
+            trip_duration = timedelta(seconds=2 * distance / max_speed)
+
+            if (
+                trip_duration <= max_trip_duration
+                and trip_duration + (place.duration or timedelta(0))
+                    <= query.interval.duration
+            ):
+                kept_places.append(place)
+
+        pruned_count = len(places) - len(kept_places)
+        self.pruned_count += pruned_count
+        self._places = kept_places
+
+        metrics.increment('search.pruned_places', pruned_count)
+        metrics.increment('search.avoided_directions_calls', 2 * pruned_count)
+    
+    def _rank_places(self, places:List[Place]) -> List[Place]:
+        '''Orders places by a cheap estimation of their solution quality.
+
+        The places are ranked nearest first by great-circle distance, which
+        needs no external API call. The streaming pipeline searches the
+        itineraries of the best ranked places first.
+
+        ARGS:
+            places: The places to rank.
+
+        RETURNS:
+            places: The ranked places.
+        '''
+        if not places:
+            return []
+
+        distances, in_radius, order = geography.get_distances(
+            self.query.location,
+            [(place.location.lat, place.location.lng) for place in places]
+        )
+
+        return [places[i] for i in order]
+    
+    def _create_solutions(self, places:List[Place]) -> List[Solution]:
+        '''Searches the itineraries of places and creates their solutions.
+
+        The outward and return itineraries of all the places are searched
+        concurrently. The solutions keep the places order, the places without
+        itineraries or free time are skipped, like the ones whose searches
+        would start after the deadline.
+
+        ARGS:
+            places: The places for which to create the solutions.
+
+        RETURNS:
+            solutions: The solutions.
+        '''
+        query = self.query
+
+        def fetch_itinerary(trip:tuple):
+            place, is_outward = trip
+
+            if not self._has_time_left():
+                return None
+
+            if is_outward:
+                return geography.fetch_itinerary(
+                    start_location=query.location,
+                    end_location=place.location,
+                    mode=self.mode,
+                    departure_time=query.interval.start
+                )
             
-            return_itinerary = geography.fetch_itinerary(
+            return geography.fetch_itinerary(
                 start_location=place.location,
                 end_location=query.location,
+                mode=self.mode,
                 arrival_time=query.interval.end
             )
+        
+        trips = [
+            (place, is_outward)
+            for place in places
+            for is_outward in [True, False]
+        ]
+
+        with self._time('itineraries'):
+            itineraries = map_concurrently(
+                fetch_itinerary,
+                trips,
+                self.concurrency
+            )
+        
+        solutions = []
+        for i, place in enumerate(places):
+            outward_itinerary = itineraries[2 * i]
+            return_itinerary = itineraries[2 * i + 1]
 
             if (outward_itinerary and return_itinerary):
                 solution = Solution(
@@ -75,6 +290,7 @@ class SolutionFactory:
                     user_id=query.user_id,
                     start_location=query.location,
                     place_id=place.id,
+                    place=place,
                     interval=Interval(
                         start=query.interval.start,
                         end=query.interval.end
@@ -85,16 +301,24 @@ class SolutionFactory:
                 )
 
                 if solution.free_time.total_seconds() >= 0:
-                    self._solutions.append(solution)
-    
-    def _filter_by_trip_duration(self):
-        '''Filters and orders the solutions by trip duration.
+                    solutions.append(solution)
         
-        It keeps in the 'solutions' list attribute the solutions which respect
-        the maximum walk and maximum travel durations requested by the Query.
+        return solutions
+    
+    def _keep_by_trip_duration(
+        self,
+        solutions:List[Solution]
+    ) -> List[Solution]:
+        '''Filters and orders solutions by trip duration.
+
+        ARGS:
+            solutions: The solutions to filter.
+
+        RETURNS:
+            solutions: The solutions which respect the maximum walk and
+                       maximum travel durations, shortest trip first.
         '''
         query = self.query
-        solutions = self.solutions
         
         filtered_solutions = [
             solution
@@ -103,72 +327,301 @@ class SolutionFactory:
             and solution.travel_duration <= query.max_travel
         ]
         
-        filtered_solutions = sorted(
+        return sorted(
             filtered_solutions,
             key=lambda solution: solution.total_trip_duration
         )
+    
+    def _get_forecasts(self, places:List[Place]) -> dict:
+        '''Gets the forecasts of places during the Query interval.
+
+        The places are grouped by forecast grid cell, each cell forecasts are
+        fetched once and the cells concurrently. The cells whose fetch would
+        start after the deadline get no forecasts.
+
+        ARGS:
+            places: The places for which to get the forecasts.
+
+        RETURNS:
+            forecasts: The forecast lists by place id, None if not fetched.
+        '''
+        interval = self.query.interval
 
-        self._solutions = filtered_solutions
+        def get_cell(place:Place) -> tuple:
+            location = weather.snap_location(place.location)
+            return (location.lat, location.lng)
+
+        def fetch_forecasts(place:Place):
+            if not self._has_time_left():
+                return None
+
+            return weather.get_daily_forecasts(
+                location=weather.snap_location(place.location),
+                interval=interval
+            )
+
+        cells = {}
+        for place in places:
+            cells.setdefault(get_cell(place), place)
+
+        with self._time('forecasts'):
+            forecasts = dict(zip(
+                cells.keys(),
+                map_concurrently(
+                    fetch_forecasts,
+                    cells.values(),
+                    self.concurrency
+                )
+            ))
+
+        return {place.id: forecasts[get_cell(place)] for place in places}
     
-    def _fetch_forecasts(self):
-        '''Get forecasts for the solutions.
-        
-        It gets the weather conditions during the interval defined by the Query
-        for each Place found, then it updates the Solution with the Forecast
-        obtained.
+    def _has_good_weather(self, forecasts:list) -> bool:
+        '''Checks if forecasts respect the Query weather conditions.
+
+        The missing forecasts, not fetched before the deadline, don't.
         '''
-        solutions = []
-        for solution in self.solutions:
-            solution.forecasts = weather.get_daily_forecasts(
-                location=Place.get_from_id(solution.place_id).location,
-                interval=solution.interval
+        weather_ids = self.query.weather_ids
+
+        if forecasts is None:
+            return False
+
+        forecast_weather_ids = [
+            w['id']
+            for f in forecasts
+            for w in f.weather
+        ]
+
+        return not len(list(
+            set(forecast_weather_ids)
+            - set(weather_ids)
+        )) or not len(weather_ids)
+    
+    def _get_selectivities(self) -> dict:
+        '''Gets the measured selectivities of the filtering stages.
+
+        A selectivity is the moving average of the share of places a stage
+        keeps. The weather one is measured separately for each amount of
+        accepted weather groups, starting from their share of all the groups,
+        and apart for the queries accepting any weather.
+
+        RETURNS:
+            selectivities: The moving averages, by stage name.
+        '''
+        weather_ids = self.query.weather_ids
+        groups = weather.get_groups(weather_ids)
+
+        return {
+            'trip_duration': metrics.get_average(
+                'search.selectivity.trip_duration',
+                0.5
+            ),
+            'forecasts': metrics.get_average(
+                f"search.selectivity.forecasts.{len(groups)}"
+                    if weather_ids else 'search.selectivity.forecasts.any',
+                len(groups) / len(weather.id_groups) if weather_ids else 1
             )
-            solutions.append(solution)
+        }
+    
+    def _get_call_cost(self, histogram, cache, service:str) -> float:
+        '''Estimates the cost in seconds of an external API call.
 
-        self._solutions = solutions
+        It is the mean measured latency, weighted by the share of calls
+        which miss the cache.
+        '''
+        stats = histogram.get_stats()
+        cost = stats['mean'] if stats['count'] else DEFAULT_COSTS[service]
+
+        return cost * (1 - cache.get_stats()['hit_ratio'])
     
-    def  _filter_by_forecasts(self):
-        '''Filters and orders the solutions by forecasts.
-        
-        It keeps in the 'solutions' list attribute the solutions which respect
-        the weather conditions requested by the Query.
+    def _choose_plan(self, places:List[Place]):
+        '''Chooses the stage order with the lowest estimated cost.
+
+        Every place needs two Directions calls and every forecast grid cell
+        one weather call, but the stage running first reduces the calls of
+        the other by its selectivity. A restrictive weather query makes the
+        forecasts worth fetching first. The plan is recorded in the 'plan'
+        attribute and counted.
+
+        ARGS:
+            places: The places the stages will run on.
         '''
-        query = self.query
-        solutions = self.solutions
-        
-        filtered_solutions = []
-        for solution in solutions:
-            solution_weather_ids = [
-                w['id']
-                for f in solution.forecasts
-                for w in f.weather
+        selectivities = self._get_selectivities()
+
+        cells = set()
+        for place in places:
+            cell = weather.snap_location(place.location)
+            cells.add((cell.lat, cell.lng))
+
+        directions_cost = 2 * len(places) * self._get_call_cost(
+            geography.directions_latency,
+            geography.directions_cache,
+            'directions'
+        )
+        forecasts_cost = len(cells) * self._get_call_cost(
+            weather.latency,
+            weather.forecast_cache,
+            'weather'
+        )
+
+        costs = {
+            'itineraries_first': directions_cost
+                + forecasts_cost * selectivities['trip_duration'].value,
+            'forecasts_first': forecasts_cost
+                + directions_cost * selectivities['forecasts'].value
+        }
+        name = min(costs, key=costs.get)
+
+        self.plan = {
+            'name': name,
+            'stages': PLANS[name],
+            'costs': costs,
+            'selectivities': {
+                stage: selectivity.value
+                for stage, selectivity in selectivities.items()
+            }
+        }
+
+        metrics.increment(f"search.plan.{name}")
+    
+    def _run_stages(self, places:List[Place]) -> List[Solution]:
+        '''Runs all the stages on places, in the order of the plan.
+
+        The plan is chosen on the first call. The share of places kept by
+        each filtering stage is observed to improve the next plans, unless
+        calls have been skipped because of the deadline.
+
+        ARGS:
+            places: The places from which to create the solutions.
+
+        RETURNS:
+            solutions: The accepted solutions, shortest trip first.
+        '''
+        if not places:
+            return []
+
+        if self.plan is None:
+            self._choose_plan(places)
+
+        selectivities = self._get_selectivities()
+
+        if self.plan['name'] == 'forecasts_first':
+            forecasts = self._get_forecasts(places)
+            kept_places = [
+                place
+                for place in places
+                if self._has_good_weather(forecasts[place.id])
             ]
+            if not self.partial:
+                selectivities['forecasts'].observe(
+                    len(kept_places) / len(places)
+                )
+
+            solutions = self._keep_by_trip_duration(
+                self._create_solutions(kept_places)
+            )
+
+            if kept_places and not self.partial:
+                selectivities['trip_duration'].observe(
+                    len(solutions) / len(kept_places)
+                )
+
+            for solution in solutions:
+                solution.forecasts = forecasts[solution.place_id]
+            
+            return solutions
+
+        solutions = self._keep_by_trip_duration(
+            self._create_solutions(places)
+        )
+
+        if not self.partial:
+            selectivities['trip_duration'].observe(
+                len(solutions) / len(places)
+            )
 
-            has_good_weather = not len(list(
-                set(solution_weather_ids)
-                - set(query.weather_ids)
-            )) or not len(query.weather_ids)
+        places_by_id = {place.id: place for place in places}
+        forecasts = self._get_forecasts([
+            places_by_id[solution.place_id]
+            for solution in solutions
+        ])
 
-            if has_good_weather:
-                filtered_solutions.append(solution)
+        accepted_solutions = []
+        for solution in solutions:
+            solution.forecasts = forecasts[solution.place_id]
 
-        self._solutions = filtered_solutions
+            if self._has_good_weather(solution.forecasts):
+                accepted_solutions.append(solution)
 
+        if solutions and not self.partial:
+            selectivities['forecasts'].observe(
+                len(accepted_solutions) / len(solutions)
+            )
+        
+        return accepted_solutions
+    
     def execute(self) -> List[Solution]:
         '''Executes the query and returns the solutions.
         
-        It runs the method sequence which generates the Solutions requested by
-        the Query, then it returns the populated 'solutions' list attribute.
+        It collects the solutions of the streaming pipeline, which stops as
+        soon as the Query max_results solutions have been accepted, see
+        stream. With a Query deadline_ms, the external calls which would
+        start after the deadline are skipped and the 'partial' attribute is
+        set.
 
         RETURNS:
             solutions: The list of solutions which match the search Query.
         '''
+        return list(self.stream())
+
+    def stream(self, on_batch=None) -> Iterator[Solution]:
+        '''Executes the query lazily and yields the solutions.
+
+        The ranked places flow through all the stages in batches of
+        'concurrency' places. The pipeline stops as soon as the Query
+        max_results solutions have been accepted, so the itineraries and
+        forecasts of the remaining places are never searched. The solutions
+        follow the places ranking, then the trip duration inside a batch.
+        The accepted solutions are added to the 'solutions' list attribute.
+        With a Query deadline_ms, no batch starts after the deadline and the
+        'partial' attribute is set if places have not been searched.
+
+        ARGS:
+            on_batch: The function called after each batch with the amount
+                      of places processed and the amount of ranked places,
+                      even if the batch gives no solution.
+
+        YIELDS:
+            solution: Each solution which matches the search Query.
+        '''
         max_results = self.query.max_results
+        batch_size = max(1, self.concurrency)
 
-        self._fetch_places()
-        self._fetch_itineraries()
-        self._filter_by_trip_duration()
-        self._fetch_forecasts()
-        self._filter_by_forecasts()
-        
-        return self.solutions[:max_results]
\ No newline at end of file
+        self._start_deadline()
+
+        with self._time('places'):
+            self._fetch_places()
+            self._prune_places()
+
+        self._solutions = []
+        self.processed_count = 0
+        places = self._rank_places(self.places)
+        self._choose_plan(places)
+
+        for start in range(0, len(places), batch_size):
+            if not self._has_time_left():
+                return
+
+            batch = places[start:start + batch_size]
+            solutions = self._run_stages(batch)
+            self.processed_count += len(batch)
+
+            if on_batch:
+                on_batch(self.processed_count, len(places))
+
+            for solution in solutions:
+                self._solutions.append(solution)
+                yield solution
+
+                if max_results and len(self.solutions) >= max_results:
+                    return
@@ -9,6 +9,7 @@ from entities.query import Query
 from entities.review import Review
 
 from utils import time
+from services import database
 
 
 # Entity generator
@@ -43,6 +44,9 @@ def generate_query(user:User=None) -> Query:
     return query
 
 
+# Create the database schema
+database.create_schema()
+
 # Drop all database tables
 #with database.create_session().begin() as db_session:
 #    database.Base.metadata.drop_all(db_session.get_bind())
@@ -28,8 +28,9 @@ def get():
     request = app.get_request()
 
     if flask.request.method == 'GET':
-        partners = Partner.get_all(request)
-        return app.response(partners)
+        page = app.get_page(request)
+        partners = Partner.get_all(request, **page)
+        return app.page_response(partners, page['limit'])
     
     elif flask.request.method == 'POST':
         partner = Partner.from_dict(request)
@@ -44,11 +45,8 @@ def get_for_solution(solution_id):
     RETURNS:
         response: The JSON response containing the partners.
     '''
-    partners = []
-    for partner_id in Solution.get_from_id(solution_id).get_partner_ids():
-        partners.append(Partner.get_from_id(partner_id))
-        
-    return app.response(partners)
+    partner_ids = Solution.get_from_id(solution_id).get_partner_ids()
+    return app.response(Partner.get_many(partner_ids))
 
 
 @blueprint.route('/<partner_id>', methods=['GET', 'DELETE', 'PUT'])
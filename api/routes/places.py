@@ -27,8 +27,9 @@ def get():
     request = app.get_request()
 
     if flask.request.method == 'GET':
-        places = Place.get_all(request)
-        return app.response(places)
+        page = app.get_page(request)
+        places = Place.get_all(request, **page)
+        return app.page_response(places, page['limit'])
     
     elif flask.request.method == 'POST':
         place = Place.from_dict(request)
@@ -26,8 +26,9 @@ def get():
     '''
     request = app.get_request()
 
-    queries = Query.get_all(request)
-    return app.response(queries)
+    page = app.get_page(request)
+    queries = Query.get_all(request, **page)
+    return app.page_response(queries, page['limit'])
 
 
 @blueprint.route('/<query_id>', methods=['GET'])
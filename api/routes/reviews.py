@@ -4,8 +4,6 @@ import flask_jwt_extended as flask_jwt
 from utils import app
 from entities.review import Review
 from entities.user import User
-from entities.place import Place
-from entities.partner import Partner
 
 
 blueprint = flask.Blueprint(
@@ -29,23 +27,9 @@ def get():
     request = app.get_request()
 
     if flask.request.method == 'GET':
-        reviews = Review.get_all(request)
-
-        for i, review in enumerate(reviews):
-            reviews[i].user_name = User.get_from_id(
-                review.user_id
-            ).name if review.user_id else None
-
-            reviews[i].partner_name = Partner.get_from_id(
-                review.partner_id
-            ).name if review.partner_id else None
-            
-            reviews[i].place_name = Place.get_from_id(
-                review.place_id
-            ).name if review.place_id else None
-            
-
-        return app.response(reviews)
+        page = app.get_page(request)
+        reviews = Review.get_all(request, **page)
+        return app.page_response(reviews, page['limit'])
     
     elif flask.request.method == 'POST':
         user = User.get_from_access_token()
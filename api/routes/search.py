@@ -1,4 +1,4 @@
-from random import randrange, sample # TEMP
+from queue import Full
 
 import flask
 import flask_jwt_extended as flask_jwt
@@ -10,6 +10,7 @@ from entities.place import Place
 from entities.partner import Partner
 from entities.solution import Solution
 from factories.solution_factory import SolutionFactory
+from services import database, search_cache, search_jobs
 
 
 blueprint = flask.Blueprint(
@@ -23,45 +24,159 @@ blueprint = flask.Blueprint(
 @flask_jwt.jwt_required(optional=True)
 def execute():
     '''The API route to get query results.
+
+    The solutions of the queries with the same fingerprint are served from
+    the search cache while fresh, the concurrent ones share one execution.
+    With a deadline_ms, the solutions found within it are returned.
     
     RETURNS:
-        response: The JSON response containing the results.
+        response: The JSON response containing the results, its meta is the
+                  report of the execution which found them: if they are
+                  partial, the time spent in each stage in milliseconds and
+                  if they are cached or shared with a concurrent search.
     
     RAISES:
         400 response: Bad request if the search query has not been found.
+        504 response: Gateway timeout if an identical search didn't end
+                      within the coalescing wait.
     '''
     
     request = app.get_request()
 
     query = Query.from_dict(request)
     query.save()
+
+    # The search must not hold the write lock while calling the services
+    database.commit_request_session()
+
+    def run_search():
+        solution_factory = SolutionFactory(query)
+        solutions = solution_factory.execute()
+        return solutions, solution_factory.get_report()
+
+    try:
+        results, report = search_cache.get_or_execute(query, run_search)
+    except TimeoutError:
+        flask.abort(504)
+
+    response = Solution.attach_places(results)
+    for solution in response:
+        solution.save()
     
+    return app.response(response, meta=report)
 
 
-    # TEMP
-    solution_factory = SolutionFactory(query)
-    solution_factory._solutions = Solution.get_all()
-    solution_factory._filter_by_trip_duration()
-    solution_factory._filter_by_forecasts()
-    response = []
-    for solution in solution_factory._solutions[:query.max_results]:
-        solution.place = Place.get_from_id(solution.place_id)
-        response.append(solution)
-    return app.response(response)
+@blueprint.route('/stream', methods=['POST'])
+@flask_jwt.jwt_required(optional=True)
+def stream():
+    '''The API route to get query results as soon as they are found.
 
+    The response is NDJSON: each line is a standard response object holding
+    one solution with its place, in the order the factory accepts them. An
+    error during the search ends the stream with an error line. The query and
+    each solution are committed at once, so the stream never holds the
+    database write lock while searching.
+    
+    RETURNS:
+        response: The NDJSON streamed response containing the results.
+    
+    RAISES:
+        400 response: Bad request if the search query has not been found.
+    '''
+    request = app.get_request()
+
+    query = Query.from_dict(request)
+    query.save()
+    database.commit_request_session()
 
+    def generate():
+        try:
+            solutions = search_cache.get_solutions(query)
 
-    solution_factory = SolutionFactory(query)
-    results = solution_factory.execute()
+            if solutions is None:
+                solution_factory = SolutionFactory(query)
+                solutions = []
+
+                for solution in solution_factory.stream():
+                    Solution.attach_places(
+                        [solution],
+                        solution_factory.places
+                    )
+                    solution.save()
+                    database.commit_request_session()
+                    solutions.append(solution)
+                    yield app.json_line(solution)
+
+                if not solution_factory.partial:
+                    search_cache.set_solutions(
+                        query,
+                        solutions,
+                        solution_factory.get_report()
+                    )
+
+            else:
+                for solution in Solution.attach_places(solutions):
+                    solution.save()
+                    database.commit_request_session()
+                    yield app.json_line(solution)
+
+        except Exception as e:
+            yield app.json_line(None, e)
+
+    return flask.Response(
+        flask.stream_with_context(generate()),
+        mimetype='application/x-ndjson'
+    )
 
-    response = []
-    for solution in results:
-        solution.save()
 
-        solution.place = Place.get_from_id(solution.place_id)
-        response.append(solution)
+@blueprint.route('/jobs', methods=['POST'])
+@flask_jwt.jwt_required(optional=True)
+def submit_job():
+    '''The API route to execute a query in the background.
+
+    The query is queued in the local search workers and the job id is
+    returned at once, the job results are polled with the job route.
+    
+    RETURNS:
+        response: The JSON response containing the queued job.
     
-    return app.response(response)
+    RAISES:
+        400 response: Bad request if the search query has not been found.
+        429 response: Too many requests if the job queue is full.
+    '''
+    request = app.get_request()
+
+    query = Query.from_dict(request)
+
+    try:
+        job = search_jobs.submit(query)
+    except Full:
+        flask.abort(429)
+
+    response = app.response(job.get_info())
+    response.status_code = 202
+
+    return response
+
+
+@blueprint.route('/jobs/<job_id>', methods=['GET'])
+@flask_jwt.jwt_required(optional=True)
+def job(job_id):
+    '''The API route to get the progress and the results of a search job.
+    
+    RETURNS:
+        response: The JSON response containing the job status, progress and
+                  the solutions found so far.
+    
+    RAISES:
+        404 response: Not found if the job doesn't exist or has expired.
+    '''
+    job = search_jobs.get_job(job_id)
+
+    if not job:
+        flask.abort(404)
+
+    return app.response(job.get_info())
 
 
 @blueprint.route('/save', methods=['POST'])
@@ -158,10 +273,7 @@ def fetch():
     user = User.get_from_access_token()
     if user:
         solutions = Solution.get_all({'user_id': user.id})
-        response = []
-        for solution in solutions:
-            solution.place = Place.get_from_id(solution.place_id)
-            response.append(solution)
+        response = Solution.attach_places(solutions)
         
         response = sorted(response, key=lambda solution: solution.interval.start, reverse=True)
         
@@ -28,8 +28,9 @@ def get():
     request = app.get_request()
 
     if flask.request.method == 'GET':
-        solutions = Solution.get_all(request)
-        return app.response(solutions)
+        page = app.get_page(request)
+        solutions = Solution.get_all(request, **page)
+        return app.page_response(solutions, page['limit'])
     
     elif flask.request.method == 'POST':
         solution = Solution.from_dict(request)
@@ -3,13 +3,12 @@ from datetime import timedelta
 
 import flask
 
-from utils import app
+from utils import app, cache, metrics
 from entities.user import User
-from entities.place import Place
 from entities.partner import Partner
 from entities.query import Query
 from entities.review import Review
-from services import weather
+from services import weather, aggregates
 
 
 blueprint = flask.Blueprint(
@@ -32,34 +31,29 @@ def overview():
         403 response: Forbidden if the review hasn't one of the required roles.
     '''
 
-    users = {
-        'total_count': User.get_count({'role': 'user'}),
-        'confirmed_count': User.get_count({'role': 'user', 'confirmed': True})
-    }
-
-    queries = {
-        'total_count': Query.get_count(),
-        'anonymous_count': Query.get_count({'user_id': None})
-    }
+    return app.response(aggregates.get_overview_counts())
 
-    places = {
-        'total_count': Place.get_count()
-    }
 
-    partners = {
-        'total_count': Partner.get_count()
-    }
-
-    reviews = {
-        'total_count': Review.get_count()
-    }
+@blueprint.route('/services', methods=['GET'])
+@app.jwt_required(roles=['admin'])
+def services():
+    '''The API route to get the external services statistics.
+    
+    RETURNS:
+        response: The JSON response containing the cache counters, the
+                  latency histograms in seconds, the event counters and the
+                  moving averages, like the search stage selectivities.
+    
+    RAISES:
+        401 response: Unauthorized if the request has not the JWT.
+        403 response: Forbidden if the user hasn't one of the required roles.
+    '''
 
     return app.response({
-        'users': users,
-        'partners': partners,
-        'places': places,
-        'queries': queries,
-        'reviews': reviews
+        'caches': cache.get_stats(),
+        'latencies': metrics.get_stats(),
+        'counters': metrics.get_counters(),
+        'averages': metrics.get_averages()
     })
 
 
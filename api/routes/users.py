@@ -27,8 +27,9 @@ def get():
     request = app.get_request()
 
     if flask.request.method == 'GET':
-        users = User.get_all(request)
-        return app.response(users)
+        page = app.get_page(request)
+        users = User.get_all(request, **page)
+        return app.page_response(users, page['limit'])
     
     elif flask.request.method == 'POST':
         user = User.from_dict(request)
@@ -0,0 +1,105 @@
+from sqlalchemy import func, select
+
+from services import database
+from entities.user import UserRow
+from entities.place import Place, PlaceRow
+from entities.partner import Partner, PartnerRow
+from entities.query import QueryRow
+from entities.review import ReviewRow
+
+
+'''The aggregate columns, named as the migrations of database.create_schema'''
+COLUMNS = [
+    f"{table}.{column}"
+    for table in ['place', 'partner']
+    for column in ['rating_sum', 'review_count', 'query_count']
+]
+
+
+def _count(row_class, *criteria):
+    '''Returns a scalar COUNT subquery for a row class and criteria'''
+    return (
+        select(func.count(row_class.id))
+        .where(*criteria)
+        .scalar_subquery()
+    )
+
+
+def get_overview_counts() -> dict:
+    '''Gets the entity counts of the statistics overview.
+
+    All the counts are computed by the database in a single statement.
+
+    RETURNS:
+        counts: The counts grouped by entity.
+    '''
+    statement = select(
+        _count(UserRow, UserRow.role == 'user').label('users_total'),
+        _count(
+            UserRow,
+            UserRow.role == 'user',
+            UserRow.confirmed == True
+        ).label('users_confirmed'),
+        _count(QueryRow).label('queries_total'),
+        _count(QueryRow, QueryRow.user_id == None).label('queries_anonymous'),
+        _count(PlaceRow).label('places_total'),
+        _count(PartnerRow).label('partners_total'),
+        _count(ReviewRow).label('reviews_total')
+    )
+
+    with database.session_scope() as db_session:
+        counts = db_session.execute(statement).one()
+
+    return {
+        'users': {
+            'total_count': counts.users_total,
+            'confirmed_count': counts.users_confirmed
+        },
+        'queries': {
+            'total_count': counts.queries_total,
+            'anonymous_count': counts.queries_anonymous
+        },
+        'places': {
+            'total_count': counts.places_total
+        },
+        'partners': {
+            'total_count': counts.partners_total
+        },
+        'reviews': {
+            'total_count': counts.reviews_total
+        }
+    }
+
+
+def repair() -> dict:
+    '''Recomputes the rating and query aggregates stored on the rows.
+
+    The aggregates are maintained incrementally, this bulk recomputation
+    fixes them after a migration or changes made outside the entities.
+
+    RETURNS:
+        counts: The amount of rows updated by entity.
+    '''
+    return {
+        'places': Place.repair_stats(),
+        'partners': Partner.repair_stats()
+    }
+
+
+def repair_migrated(migrated:list) -> dict:
+    '''Recomputes the aggregates if a migration has just added their columns.
+
+    The added columns start at 0 for the existing rows, they are repaired at
+    once instead of waiting for the repair-aggregates command.
+
+    ARGS:
+        migrated: The columns and indexes added, see database.create_schema.
+
+    RETURNS:
+        counts: The amount of rows updated by entity, empty if no aggregate
+                column has been added.
+    '''
+    if not set(migrated) & set(COLUMNS):
+        return {}
+
+    return repair()
@@ -1,7 +1,11 @@
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, func, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -13,15 +17,29 @@ load_dotenv()
 Base = declarative_base()
 
 
-def create_session(engine=None):
-    '''Creates a database session.
-    
+'''Process-wide registries of engines and session classes by database URL'''
+_engines = {}
+_sessionmakers = {}
+_registry_lock = threading.Lock()
+
+
+'''The session shared by all the entity calls of the current request'''
+_request_session = ContextVar('request_session', default=None)
+
+
+'''The maximum amount of ids bound in one IN clause, below SQLite's limit'''
+MAX_BOUND_IDS = 900
+
+
+def get_url(engine=None) -> str:
+    '''Gets the database URL to use.
+
     ARGS:
-        engine: The database engine, it uses the DB_ENGINE environment variable.
+        engine: The database URL, it uses the DB_ENGINE environment variable
         or a SQLite database if no engine has been declared.
 
     RETURNS:
-        Session: The SQLAlchemy database session class.
+        url: The database URL.
     '''
     default_db_path = os.path.join(
         os.path.dirname(os.path.realpath(__file__)),
@@ -29,15 +47,323 @@ def create_session(engine=None):
         'outdoor_muse.sqlite'
     )
 
-    engine = create_engine(
+    return (
         engine
         or os.getenv('DB_ENGINE')
         or f"sqlite:///{default_db_path}"
     )
-    
-    Base.metadata.create_all(engine)
-    Base.metadata.bind = engine
 
-    Session = sessionmaker(bind=engine)
-    
-    return Session
\ No newline at end of file
+
+def _get_pool_options(url:str) -> dict:
+    '''Gets the connection pool options from the environment.
+
+    The pool size and overflow only apply to server databases, SQLite uses
+    its own pool classes which don't accept them.
+
+    ARGS:
+        url: The database URL.
+
+    RETURNS:
+        options: The keyword arguments for create_engine.
+    '''
+    options = {
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE') or 3600),
+        'pool_pre_ping': (os.getenv('DB_POOL_PRE_PING') or 'true').lower()
+            in ['1', 'true', 'yes']
+    }
+
+    if make_url(url).get_backend_name() != 'sqlite':
+        options.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE') or 5),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW') or 10)
+        })
+
+    return options
+
+
+def get_engine(engine=None):
+    '''Gets the database engine, creating it once per process and URL.
+
+    ARGS:
+        engine: The database URL, see get_url.
+
+    RETURNS:
+        Engine: The SQLAlchemy engine.
+    '''
+    url = get_url(engine)
+
+    if url not in _engines:
+        with _registry_lock:
+            if url not in _engines:
+                db_engine = create_engine(url, **_get_pool_options(url))
+                _sessionmakers[url] = sessionmaker(
+                    bind=db_engine,
+                    expire_on_commit=False
+                )
+                _engines[url] = db_engine
+
+    return _engines[url]
+
+
+def create_session(engine=None):
+    '''Creates a database session.
+
+    ARGS:
+        engine: The database engine, it uses the DB_ENGINE environment variable.
+        or a SQLite database if no engine has been declared.
+
+    RETURNS:
+        Session: The SQLAlchemy database session class.
+    '''
+    get_engine(engine)
+
+    return _sessionmakers[get_url(engine)]
+
+
+def begin_request_session(engine=None):
+    '''Opens the session shared by all the entity calls of a request.
+
+    Until end_request_session is called, session_scope yields this session
+    so the whole request runs in one connection and one transaction.
+
+    ARGS:
+        engine: The database URL, see get_url.
+
+    RETURNS:
+        session: The request session.
+    '''
+    session = create_session(engine)()
+    session.begin()
+    _request_session.set(session)
+
+    return session
+
+
+def commit_request_session():
+    '''Commits the changes of the request session, if any, and keeps it open.
+
+    The requests waiting on external services call it before, so they don't
+    hold the database write lock while waiting.
+    '''
+    session = _request_session.get()
+
+    if session is not None:
+        session.commit()
+
+
+def end_request_session(rollback:bool=False):
+    '''Commits or rolls back and closes the request session, if any.
+
+    A session which is no longer active, like after a failed flush, is
+    always rolled back.
+
+    ARGS:
+        rollback: If the request transaction has to be rolled back.
+    '''
+    session = _request_session.get()
+
+    if session is None:
+        return
+
+    _request_session.set(None)
+
+    try:
+        if rollback or not session.is_active:
+            session.rollback()
+        else:
+            session.commit()
+
+    finally:
+        session.close()
+
+
+@contextmanager
+def session_scope(engine=None):
+    '''Provides a session to run entity operations.
+
+    Inside a request it yields the request session and only flushes the
+    changes, the request hooks commit them. Outside a request, like in
+    scripts, it opens a new session and commits its own transaction.
+
+    ARGS:
+        engine: The database URL, see get_url. Giving it always opens a new
+        session.
+
+    YIELDS:
+        session: The SQLAlchemy database session.
+    '''
+    session = _request_session.get()
+
+    if session is not None and not engine:
+        yield session
+        session.flush()
+
+    else:
+        with create_session(engine).begin() as session:
+            yield session
+
+
+def increment(db_session, table_name:str, row_id:int, **deltas):
+    '''Increments columns of a row in a single atomic UPDATE.
+
+    The copy of the row held by the session, if any, is expired so it is
+    reloaded with the new values.
+
+    ARGS:
+        db_session: The database session.
+        table_name: The name of the table holding the row.
+        row_id: The id of the row to update.
+        deltas: The amount to add to each column, by column name.
+    '''
+    table = Base.metadata.tables[table_name]
+
+    db_session.execute(
+        table.update()
+        .where(table.c.id == row_id)
+        .values({
+            table.c[name]: table.c[name] + delta
+            for name, delta in deltas.items()
+        })
+    )
+
+    for instance in list(db_session.identity_map.values()):
+        if instance.__table__ is table and instance.id == row_id:
+            db_session.expire(instance, list(deltas.keys()))
+
+
+def chunk_ids(ids:list) -> list:
+    '''Splits ids in chunks small enough to be bound in one IN clause.
+
+    ARGS:
+        ids: The row ids, duplicates and numeric strings are accepted.
+
+    RETURNS:
+        chunks: The lists of unique integer ids, at most MAX_BOUND_IDS each.
+    '''
+    unique_ids = list(dict.fromkeys(int(id) for id in ids))
+
+    return [
+        unique_ids[start:start + MAX_BOUND_IDS]
+        for start in range(0, len(unique_ids), MAX_BOUND_IDS)
+    ]
+
+
+def paginate(query, id_column, limit:int=None, after:int=None):
+    '''Applies the keyset pagination to a query.
+
+    The rows are ordered by id and a page starts right after the last id of
+    the previous one, so it costs the same whatever its position.
+
+    ARGS:
+        query: The SQLAlchemy query.
+        id_column: The id column of the paginated rows.
+        limit: The maximum amount of rows, all of them if None.
+        after: The id after which the page starts, the first page if None.
+
+    RETURNS:
+        query: The paginated query.
+    '''
+    if after is not None:
+        query = query.filter(id_column > after)
+
+    query = query.order_by(id_column)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
+def _get_column_ddl(column, dialect) -> str:
+    '''Gets the DDL used to add a column to an existing table'''
+    name = dialect.identifier_preparer.quote(column.name)
+    ddl = f"{name} {column.type.compile(dialect=dialect)}"
+
+    default = column.default.arg if column.default is not None else None
+
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    elif isinstance(default, (int, float)):
+        ddl += f" DEFAULT {default}"
+
+    return ddl
+
+
+def create_schema(engine=None):
+    '''Creates or migrates the database schema.
+
+    It creates the missing tables, then adds the columns and indexes declared
+    on the ORM rows but missing from the existing tables. It has to run once
+    at deploy time, the sessions never touch the schema.
+
+    ARGS:
+        engine: The database URL, see get_url.
+
+    RETURNS:
+        migrated: The list of the columns and indexes added to existing tables.
+    '''
+    db_engine = get_engine(engine)
+    dialect = db_engine.dialect
+    preparer = dialect.identifier_preparer
+
+    existing_tables = inspect(db_engine).get_table_names()
+    Base.metadata.create_all(db_engine)
+
+    migrated = []
+    inspector = inspect(db_engine)
+
+    with db_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            column_names = [
+                column['name']
+                for column in inspector.get_columns(table.name)
+            ]
+
+            for column in table.columns:
+                if column.name not in column_names:
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {_get_column_ddl(column, dialect)}"
+                    )
+                    migrated.append(f"{table.name}.{column.name}")
+
+            index_names = [
+                index['name']
+                for index in inspector.get_indexes(table.name)
+            ]
+
+            for index in table.indexes:
+                if index.name not in index_names:
+                    index.create(connection)
+                    migrated.append(index.name)
+
+    return migrated
+
+
+def get_table_names(engine=None) -> list:
+    '''Gets the names of the tables existing in the database.
+
+    ARGS:
+        engine: The database URL, see get_url.
+
+    RETURNS:
+        names: The sorted table names.
+    '''
+    return sorted(inspect(get_engine(engine)).get_table_names())
+
+
+def reset():
+    '''Disposes all the registered engines and empties the registries.
+
+    It has to be called when the DB_ENGINE environment variable changes or
+    when the database file is removed, for example between tests.
+    '''
+    with _registry_lock:
+        for db_engine in _engines.values():
+            db_engine.dispose()
+
+        _engines.clear()
+        _sessionmakers.clear()
@@ -1,22 +1,44 @@
 import os
+from copy import deepcopy
 from math import cos, sin, pi, atan2, sqrt
 from datetime import datetime, timedelta
 from typing import List
 
 from dotenv import load_dotenv
 import googlemaps
+import numpy as np
 
-from services import database
-from entities.place import Place, PlaceRow
+from entities.place import Place
 from entities.itinerary import Itinerary
 from entities.location import Location
+from utils.cache import Cache
+from utils.metrics import Histogram
 
 
 load_dotenv()
-gmaps = googlemaps.Client(key=os.getenv('GOOGLE_KEY'))
+gmaps = googlemaps.Client(
+    key=os.getenv('GOOGLE_KEY'),
+    timeout=int(os.getenv('DIRECTIONS_TIMEOUT') or 10)
+)
 language = os.getenv('LANGUAGE')
 
 
+'''The mean Earth radius in meters'''
+EARTH_RADIUS = 6371000.0
+
+
+'''The Directions responses, by quantized trip'''
+directions_cache = Cache(
+    'directions',
+    max_size=int(os.getenv('DIRECTIONS_CACHE_SIZE') or 10000),
+    ttl=int(os.getenv('DIRECTIONS_CACHE_TTL') or 3600),
+    path=os.getenv('DIRECTIONS_CACHE_PATH')
+)
+directions_cache_grid = int(os.getenv('DIRECTIONS_CACHE_GRID') or 100)
+directions_cache_bucket = int(os.getenv('DIRECTIONS_CACHE_BUCKET') or 900)
+directions_latency = Histogram('directions')
+
+
 def get_distance(location_from:Location, location_to:Location) -> int:
     '''Calculates the distance from a location to another.
     
@@ -34,16 +56,61 @@ def get_distance(location_from:Location, location_to:Location) -> int:
     lat_to = location_to.lat
     lng_to = location_to.lng
 
-    r = 6371.0
     phi_1 = lat_from * pi/180.0
     phi_2 = lat_to * pi/180.0
     delta_phi = (lat_to - lat_from) * pi/180.0
     delta_lambda = (lng_to - lng_from) * pi/180.0
-    a = sin(delta_phi/2)**2 + (cos(phi_1) + cos(phi_2)) * sin(delta_lambda/2)**2
+    a = sin(delta_phi/2)**2 + cos(phi_1) * cos(phi_2) * sin(delta_lambda/2)**2
     c = 2 * atan2(sqrt(a), sqrt(1-a))
-    d = r * c
 
-    return d * 1000
+    return EARTH_RADIUS * c
+
+
+def get_distances(
+    location:Location,
+    coordinates:np.ndarray,
+    radius:int=0
+) -> tuple:
+    '''Calculates the distances from a location to many points at once.
+
+    It is the vectorized version of get_distance, the whole computation runs
+    in NumPy without a Python loop over the points.
+    
+    ARGS:
+        location: The location from which to calculate.
+        coordinates: The latitudes and longitudes of the points in degrees,
+                     as an array of shape (n, 2).
+        radius: The radius in which to keep points, all of them if 0.
+    
+    RETURNS:
+        distances: The distances to the points in meters.
+        in_radius: The boolean mask of the points in the radius.
+        order: The indexes of the points in the radius, nearest first.
+    '''
+    points = np.radians(
+        np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    )
+    phi_1 = location.lat * pi/180.0
+    phi_2 = points[:, 0]
+
+    delta_phi = phi_2 - phi_1
+    delta_lambda = points[:, 1] - location.lng * pi/180.0
+
+    a = (
+        np.sin(delta_phi/2)**2
+        + cos(phi_1) * np.cos(phi_2) * np.sin(delta_lambda/2)**2
+    )
+    distances = EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    if radius:
+        in_radius = distances < radius
+    else:
+        in_radius = np.ones(len(distances), dtype=bool)
+
+    indexes = np.flatnonzero(in_radius)
+    order = indexes[np.argsort(distances[indexes], kind='stable')]
+
+    return distances, in_radius, order
 
 
 def filter_places_by_distance(
@@ -61,12 +128,16 @@ def filter_places_by_distance(
     RETURNS:
         places: The filtered and ordered place list.
     '''
-    distances = map(lambda x: get_distance(location, x.location), places)
-    with_distance = zip(places, distances)
-    filtered = filter(lambda x: x[1] < radius, with_distance) if radius else 0
-    srtd = sorted(filtered or with_distance, key=lambda x: x[1])
+    if not places:
+        return []
 
-    return [x[0] for x in srtd]
+    coordinates = np.array(
+        [(place.location.lat, place.location.lng) for place in places],
+        dtype=np.float64
+    )
+    distances, in_radius, order = get_distances(location, coordinates, radius)
+
+    return [places[i] for i in order]
 
 
 def fetch_places_nearby(
@@ -76,6 +147,9 @@ def fetch_places_nearby(
     language:str=language
 ) -> List[Place]:
     '''Uses database places and Google Places API to make a Nearby Search.
+
+    The solution factory searches the radiuses with the place index, see
+    services.place_index, this search loads all the places.
     
     ARGS:
         location: The position from which to search.
@@ -85,17 +159,11 @@ def fetch_places_nearby(
     RETURNS:
         places: A place list.
     '''
-    db_places = []
-    
-    with database.create_session().begin() as db_session:
-        db_places = filter_places_by_distance(
-            location,
-            [
-                Place.get_from_id(x.id)
-                for x in db_session.query(PlaceRow).all()
-            ],
-            radius
-        )
+    db_places = filter_places_by_distance(
+        location,
+        Place.get_all(),
+        radius
+    )
 
     '''
     response = gmaps.places_nearby(
@@ -116,6 +184,41 @@ def fetch_places_nearby(
         return db_places
 
 
+def get_directions_key(
+    start_location:Location,
+    end_location:Location,
+    mode:str,
+    departure_time:datetime=None,
+    arrival_time:datetime=None,
+    language:str=language
+) -> tuple:
+    '''Gets the Directions cache key of a trip.
+
+    The locations are snapped to a grid of DIRECTIONS_CACHE_GRID meters and
+    the times to buckets of DIRECTIONS_CACHE_BUCKET seconds, so close trips
+    share their itineraries.
+    
+    RETURNS:
+        key: The trip cache key.
+    '''
+    cell = directions_cache_grid / (EARTH_RADIUS * pi/180.0)
+
+    def snap(location:Location) -> tuple:
+        return (round(location.lat / cell), round(location.lng / cell))
+    
+    def bucket(dt:datetime) -> int:
+        return int(dt.timestamp() // directions_cache_bucket) if dt else None
+
+    return (
+        snap(start_location),
+        snap(end_location),
+        mode,
+        bucket(departure_time),
+        bucket(arrival_time),
+        language
+    )
+
+
 def fetch_itinerary(
     start_location:Location,
     end_location:Location,
@@ -138,15 +241,33 @@ def fetch_itinerary(
     RETURNS:
         itinerary: An itinerary object.
     '''
-    response = gmaps.directions(
-        origin=start_location.to_dict(),
-        destination=end_location.to_dict(),
-        mode=mode or 'transit',
-        departure_time=departure_time,
-        arrival_time=arrival_time,
-        language=language,
-        units='metric'
+    mode = mode or 'transit'
+    key = get_directions_key(
+        start_location,
+        end_location,
+        mode,
+        departure_time,
+        arrival_time,
+        language
     )
+    response = directions_cache.get(key)
+
+    if response is None:
+        with directions_latency.time():
+            response = gmaps.directions(
+                origin=start_location.to_dict(),
+                destination=end_location.to_dict(),
+                mode=mode,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                language=language,
+                units='metric'
+            )
+
+        directions_cache.set(key, response)
+    
+    # The response is completed below, the cached one must stay untouched
+    response = deepcopy(response)
 
     if len(response):
         response = response[0]
@@ -0,0 +1,239 @@
+import os
+import threading
+import time as timer
+from math import sin
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+from scipy.spatial import cKDTree
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from entities.location import Location
+from entities.place import Place, PlaceRow
+from services import database
+from services.geography import EARTH_RADIUS
+
+
+load_dotenv()
+ttl = int(os.getenv('PLACE_INDEX_TTL') or 300)
+
+
+'''The current index and the generation of the place table it reflects'''
+_index = None
+_generation = 0
+_index_lock = threading.RLock()
+
+
+class _PlaceIndex:
+    '''KD-tree of the place locations.
+
+    The locations are stored as 3D unit vectors: the chord between two of
+    them grows with their great-circle distance, so the tree answers radius
+    and nearest queries on the sphere without scanning all the places.
+
+    Attributes:
+        url: The database URL the index has been built from.
+        generation: The place table generation when the build started.
+        built: The build timestamp, used for the expiration.
+        ids: The place ids, in the tree order.
+        tree: The KD-tree, None if there is no place.
+    '''
+    def __init__(
+        self,
+        url:str,
+        generation:int,
+        ids:np.ndarray,
+        coordinates:np.ndarray
+    ):
+        self.url = url
+        self.generation = generation
+        self.built = timer.monotonic()
+        self.ids = ids
+        self.tree = cKDTree(_to_vectors(coordinates)) if len(ids) else None
+
+
+def _to_vectors(coordinates:np.ndarray) -> np.ndarray:
+    '''Converts latitudes and longitudes in degrees to 3D unit vectors'''
+    points = np.radians(np.asarray(coordinates, dtype=np.float64))
+    points = points.reshape(-1, 2)
+    lat, lng = points[:, 0], points[:, 1]
+
+    return np.column_stack([
+        np.cos(lat) * np.cos(lng),
+        np.cos(lat) * np.sin(lng),
+        np.sin(lat)
+    ])
+
+
+def _to_distances(chords:np.ndarray) -> np.ndarray:
+    '''Converts chord lengths on the unit sphere to distances in meters'''
+    return 2 * EARTH_RADIUS * np.arcsin(np.clip(chords / 2, 0, 1))
+
+
+def _is_stale(index:_PlaceIndex) -> bool:
+    '''Checks if an index has to be rebuilt'''
+    return (
+        index is None
+        or index.url != database.get_url()
+        or index.generation != _generation
+        or timer.monotonic() - index.built > ttl
+    )
+
+
+def _build() -> _PlaceIndex:
+    '''Builds the index from the place table'''
+    generation = _generation
+
+    with database.session_scope() as db_session:
+        rows = db_session.query(
+            PlaceRow.id,
+            PlaceRow.location_lat,
+            PlaceRow.location_lng
+        ).filter(
+            PlaceRow.location_lat.isnot(None),
+            PlaceRow.location_lng.isnot(None)
+        ).all()
+
+    return _PlaceIndex(
+        database.get_url(),
+        generation,
+        np.array([row[0] for row in rows], dtype=np.int64),
+        np.array([row[1:] for row in rows], dtype=np.float64)
+    )
+
+
+def get_index() -> _PlaceIndex:
+    '''Gets the current index, building it if it is missing or expired.
+
+    RETURNS:
+        index: The place index.
+    '''
+    global _index
+    index = _index
+
+    if _is_stale(index):
+        with _index_lock:
+            index = _index
+
+            if _is_stale(index):
+                index = _index = _build()
+
+    return index
+
+
+def invalidate(*args):
+    '''Marks the index as stale, the next query rebuilds it.
+
+    It is called when a place row is inserted, updated or deleted, even
+    during a build, which then gives an index already stale. Other processes
+    don't receive the call, their index expires after the TTL.
+    '''
+    global _generation
+
+    with _index_lock:
+        _generation += 1
+
+
+def _invalidate_row(mapper, connection, row:PlaceRow):
+    '''Invalidates the index on a place row flush and again on its commit.
+
+    The index built between the flush and the commit still reads the old
+    rows, the second generation makes it stale.
+    '''
+    invalidate()
+
+    session = object_session(row)
+
+    if session is not None:
+        session.info['place_changed'] = True
+
+
+def _invalidate_commit(session:Session):
+    '''Invalidates the index after a commit with place changes'''
+    if session.info.pop('place_changed', False):
+        invalidate()
+
+
+def _forget_changes(session:Session, previous_transaction=None):
+    '''Forgets the place changes rolled back'''
+    session.info.pop('place_changed', None)
+
+
+def get_generation() -> int:
+    '''Gets the generation of the place table, increased by every change'''
+    return _generation
+
+
+def _get_places(ids:np.ndarray, distances:np.ndarray) -> List[Place]:
+    '''Loads the places of the index ids, nearest first'''
+    order = np.argsort(distances, kind='stable')
+    places = Place.get_many([int(id) for id in ids[order]])
+
+    return [place for place in places if place]
+
+
+def within_radius(location:Location, radius:int) -> List[Place]:
+    '''Gets the places in a radius around a location.
+
+    ARGS:
+        location: The center of the radius.
+        radius: The radius in meters.
+
+    RETURNS:
+        places: The places in the radius, nearest first.
+    '''
+    index = get_index()
+
+    if index.tree is None:
+        return []
+
+    # The chord of the radius, with a margin for the rounding errors
+    vector = _to_vectors([(location.lat, location.lng)])[0]
+    chord = 2 * sin(min(radius / EARTH_RADIUS, np.pi) / 2)
+    candidates = np.array(
+        index.tree.query_ball_point(vector, chord * (1 + 1e-9)),
+        dtype=np.int64
+    )
+
+    if not len(candidates):
+        return []
+
+    distances = _to_distances(
+        np.linalg.norm(index.tree.data[candidates] - vector, axis=1)
+    )
+    in_radius = distances < radius
+
+    return _get_places(index.ids[candidates[in_radius]], distances[in_radius])
+
+
+def nearest(location:Location, k:int) -> List[Place]:
+    '''Gets the places nearest to a location.
+
+    ARGS:
+        location: The location from which to search.
+        k: The maximum amount of places.
+
+    RETURNS:
+        places: The k nearest places, nearest first.
+    '''
+    index = get_index()
+
+    if index.tree is None or k < 1:
+        return []
+
+    vector = _to_vectors([(location.lat, location.lng)])[0]
+    chords, candidates = index.tree.query(vector, k=min(k, len(index.ids)))
+
+    return _get_places(
+        index.ids[np.atleast_1d(candidates)],
+        _to_distances(np.atleast_1d(chords))
+    )
+
+
+for identifier in ['after_insert', 'after_update', 'after_delete']:
+    event.listen(PlaceRow, identifier, _invalidate_row)
+
+event.listen(Session, 'after_commit', _invalidate_commit)
+event.listen(Session, 'after_soft_rollback', _forget_changes)
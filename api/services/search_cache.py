@@ -0,0 +1,194 @@
+import os
+from copy import deepcopy
+from datetime import datetime
+from math import pi
+from typing import List
+
+from dotenv import load_dotenv
+
+from entities.query import Query
+from entities.location import Location
+from entities.solution import Solution
+from services import place_index
+from services.geography import EARTH_RADIUS
+from utils import metrics
+from utils.cache import Cache
+from utils.concurrency import SingleFlight
+
+
+load_dotenv()
+grid = int(os.getenv('SEARCH_CACHE_GRID') or 100)
+bucket = int(os.getenv('SEARCH_CACHE_BUCKET') or 900)
+coalesce_wait = float(os.getenv('SEARCH_COALESCE_WAIT') or 30)
+
+
+'''The search solution lists with the report of the execution which found
+them, by query fingerprint and place generation.
+
+The cache stays in memory: the place changes only invalidate the entries of
+the process which made them, the other processes serve theirs until the TTL.
+'''
+cache = Cache(
+    'searches',
+    max_size=int(os.getenv('SEARCH_CACHE_SIZE') or 1000),
+    ttl=int(os.getenv('SEARCH_CACHE_TTL') or 600)
+)
+
+
+'''The searches in flight, by cache key'''
+flights = SingleFlight()
+
+
+def get_fingerprint(query:Query) -> tuple:
+    '''Gets the canonical fingerprint of a search query.
+
+    The location is snapped to a grid of SEARCH_CACHE_GRID meters and the
+    interval to buckets of SEARCH_CACHE_BUCKET seconds, the lists are sorted,
+    so the queries which would give the same solutions share it.
+
+    ARGS:
+        query: The search query.
+
+    RETURNS:
+        fingerprint: The query fingerprint.
+    '''
+    cell = grid / (EARTH_RADIUS * pi/180.0)
+
+    def snap(location:Location) -> tuple:
+        return (round(location.lat / cell), round(location.lng / cell))
+
+    def round_time(dt:datetime) -> int:
+        return int(dt.timestamp() // bucket)
+
+    return (
+        snap(query.location),
+        round_time(query.interval.start),
+        round_time(query.interval.end),
+        query.radius,
+        tuple(sorted(query.types or [])),
+        query.max_travel.total_seconds(),
+        query.max_walk.total_seconds(),
+        tuple(sorted(query.weather_ids or [])),
+        query.max_results,
+        query.language
+    )
+
+
+def get_key(query:Query) -> tuple:
+    '''Gets the cache key of a query.
+
+    It includes the place index generation, so adding, updating or removing
+    a place makes all the cached searches unreachable.
+    '''
+    return (get_fingerprint(query), place_index.get_generation())
+
+
+def get_flight_key(query:Query) -> tuple:
+    '''Gets the key of the executions shared by concurrent queries.
+
+    It includes the deadline_ms on top of the cache key, so a query only
+    waits for an execution with its own time budget and the queries without
+    deadline never share partial solutions.
+    '''
+    return (*get_key(query), query.deadline_ms)
+
+
+def _bind_solutions(query:Query, solutions:List[Solution]) -> List[Solution]:
+    '''Copies solutions and binds them to a query, without id'''
+    solutions = deepcopy(solutions)
+
+    for solution in solutions:
+        solution.id = None
+        solution.created = None
+        solution.updated = None
+        solution.query_id = query.id
+        solution.user_id = query.user_id
+
+    return solutions
+
+
+def get_solutions(query:Query) -> List[Solution]:
+    '''Gets the cached solutions of a query.
+
+    The solutions are copies bound to the query, without id, so they can be
+    saved as its own.
+
+    ARGS:
+        query: The search query.
+
+    RETURNS:
+        solutions: The cached solutions, None if the query is not cached.
+    '''
+    entry = cache.get(get_key(query))
+
+    if entry is None:
+        return None
+
+    return _bind_solutions(query, entry[0])
+
+
+def set_solutions(query:Query, solutions:List[Solution], report:dict=None):
+    '''Caches the solutions of a query.
+
+    ARGS:
+        query: The search query.
+        solutions: The solutions found, they are copied.
+        report: The report of the execution, see SolutionFactory.get_report.
+    '''
+    cache.set(get_key(query), (deepcopy(solutions), dict(report or {})))
+
+
+def get_or_execute(query:Query, execute) -> tuple:
+    '''Gets the cached solutions of a query or executes it.
+
+    The concurrent identical queries with the same deadline_ms share a
+    single execution: the first one executes and caches the complete
+    solutions, the others wait for them up to SEARCH_COALESCE_WAIT seconds.
+    All of them get the report of the execution which found the solutions.
+
+    ARGS:
+        query: The search query.
+        execute: The function without arguments returning the solutions and
+                 the execution report, see SolutionFactory.get_report. The
+                 partial solutions are not cached.
+
+    RETURNS:
+        solutions: The solutions, as copies bound to the query.
+        report: The execution report, with 'cached' and 'shared' telling if
+                the solutions come from the cache or from a concurrent query.
+
+    RAISES:
+        TimeoutError: If the shared execution didn't end within the wait.
+    '''
+    entry = cache.get(get_key(query))
+
+    if entry is not None:
+        solutions, report = entry
+        return _bind_solutions(query, solutions), {
+            **report,
+            'cached': True,
+            'shared': False
+        }
+
+    def execute_once() -> tuple:
+        solutions, report = execute()
+
+        if not report['partial']:
+            set_solutions(query, solutions, report)
+
+        return solutions, report
+
+    (solutions, report), shared = flights.do(
+        get_flight_key(query),
+        execute_once,
+        coalesce_wait
+    )
+
+    if shared:
+        metrics.increment('search.coalesced')
+
+    return _bind_solutions(query, solutions), {
+        **report,
+        'cached': False,
+        'shared': shared
+    }
@@ -0,0 +1,195 @@
+import os
+import threading
+import time as timer
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full
+
+from dotenv import load_dotenv
+
+from entities.query import Query
+from entities.solution import Solution
+from factories.solution_factory import SolutionFactory
+from services import search_cache
+from utils import metrics
+
+
+load_dotenv()
+max_jobs = int(os.getenv('SEARCH_JOB_QUEUE') or 16)
+ttl = int(os.getenv('SEARCH_JOB_TTL') or 600)
+
+
+'''The workers running the jobs, they outlive the requests'''
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SEARCH_JOB_WORKERS') or 2),
+    thread_name_prefix='search-job'
+)
+
+
+'''The jobs of this process, by id, and the amount still unfinished'''
+jobs = {}
+_pending_count = 0
+_jobs_lock = threading.Lock()
+
+
+class Job:
+    '''A search executed in the background.
+
+    Attributes:
+        id: The unique job id.
+        query: The search query.
+        status: 'queued', 'running', 'done' or 'failed'.
+        progress: The share of the places searched, from 0 to 1.
+        solutions: The solutions accepted so far, with their place.
+        error: The error message if the job failed.
+        partial: If the Query deadline_ms stopped the search early.
+        finished: The end timestamp, used for the expiration.
+    '''
+    def __init__(self, query:Query):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.status = 'queued'
+        self.progress = 0
+        self.solutions = []
+        self.error = None
+        self.partial = False
+        self.finished = None
+
+
+    def run(self):
+        '''Saves the query, then searches and saves its solutions.
+
+        The progress advances with each batch of places searched and the
+        solutions are published with their place as soon as they are
+        accepted, the complete list is cached like the synchronous searches.
+        '''
+        self.status = 'running'
+        query = self.query
+        query.save()
+
+        solutions = search_cache.get_solutions(query)
+
+        if solutions is None:
+            solution_factory = SolutionFactory(query)
+
+            for solution in solution_factory.stream(self._set_progress):
+                Solution.attach_places([solution], solution_factory.places)
+                self._publish(solution)
+
+            self.partial = solution_factory.partial
+
+            if not self.partial:
+                search_cache.set_solutions(
+                    query,
+                    self.solutions,
+                    solution_factory.get_report()
+                )
+
+        else:
+            for solution in Solution.attach_places(solutions):
+                self._publish(solution)
+
+        self.progress = 1
+        self.status = 'done'
+
+
+    def _set_progress(self, processed_count:int, place_count:int):
+        '''Updates the progress after each batch of places searched'''
+        self.progress = processed_count / place_count
+
+
+    def _publish(self, solution:Solution):
+        '''Saves a solution and adds it to the job solutions'''
+        solution.save()
+        self.solutions.append(solution)
+
+
+    def get_info(self) -> dict:
+        '''Gets the job state.
+
+        RETURNS:
+            info: The id, status, progress and error of the job, with the
+                  solutions found so far and if they are partial.
+        '''
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'solutions': list(self.solutions),
+            'partial': self.partial,
+            'error': self.error
+        }
+
+
+def _purge():
+    '''Removes the jobs finished for longer than the TTL'''
+    now = timer.monotonic()
+
+    for id, job in list(jobs.items()):
+        if job.finished is not None and now - job.finished > ttl:
+            del jobs[id]
+
+
+def _execute(job:Job):
+    '''Runs a job in a worker, recording its failure and its end'''
+    global _pending_count
+
+    try:
+        job.run()
+        metrics.increment('search.jobs.done')
+
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        metrics.increment('search.jobs.failed')
+
+    finally:
+        job.finished = timer.monotonic()
+
+        with _jobs_lock:
+            _pending_count -= 1
+
+
+def submit(query:Query) -> Job:
+    '''Queues the execution of a search query.
+
+    ARGS:
+        query: The search query, it is saved by the job.
+
+    RETURNS:
+        job: The queued job.
+
+    RAISES:
+        Full: If SEARCH_JOB_QUEUE jobs are already queued or running.
+    '''
+    global _pending_count
+
+    with _jobs_lock:
+        _purge()
+
+        if _pending_count >= max_jobs:
+            metrics.increment('search.jobs.rejected')
+            raise Full('Too many search jobs, retry later')
+
+        job = Job(query)
+        jobs[job.id] = job
+        _pending_count += 1
+
+    executor.submit(_execute, job)
+
+    return job
+
+
+def get_job(id:str) -> Job:
+    '''Gets a job of this process.
+
+    ARGS:
+        id: The job id.
+
+    RETURNS:
+        job: The job, None if it doesn't exist or has expired.
+    '''
+    with _jobs_lock:
+        _purge()
+
+        return jobs.get(id)
@@ -1,12 +1,13 @@
 import os
-import requests
-import json
 from datetime import datetime, timedelta, timezone
 from typing import List
 
 from dotenv import load_dotenv
 
 from utils import time
+from utils.cache import Cache
+from utils.http import create_session
+from utils.metrics import Histogram
 from entities.location import Location
 from entities.interval import Interval
 from entities.forecast import Forecast
@@ -15,6 +16,26 @@ from entities.forecast import Forecast
 load_dotenv()
 api_key=os.getenv('OPENWEATHER_KEY')
 language = os.getenv('LANGUAGE')
+grid = float(os.getenv('FORECAST_GRID') or 0.05)
+
+
+'''The pooled HTTP session of the OpenWeather requests'''
+session = create_session(
+    pool_size=int(os.getenv('WEATHER_POOL_SIZE') or 10),
+    retries=int(os.getenv('WEATHER_RETRIES') or 3),
+    backoff=float(os.getenv('WEATHER_BACKOFF') or 0.5)
+)
+timeout = float(os.getenv('WEATHER_TIMEOUT') or 10)
+latency = Histogram('weather')
+
+
+'''The One Call daily data, by grid cell and fetch hour'''
+forecast_cache = Cache(
+    'forecasts',
+    max_size=int(os.getenv('FORECAST_CACHE_SIZE') or 5000),
+    ttl=int(os.getenv('FORECAST_CACHE_TTL') or 3600),
+    path=os.getenv('FORECAST_CACHE_PATH')
+)
 
 
 id_groups = {
@@ -27,6 +48,42 @@ id_groups = {
 }
 
 
+def get_groups(weather_ids:List[int]) -> List[str]:
+    '''Gets the names of the weather groups containing weather ids.
+    
+    ARGS:
+        weather_ids: The weather condition ids.
+
+    RETURNS:
+        groups: The names of the groups of the ids, in the id_groups order.
+    '''
+    weather_ids = set(weather_ids or [])
+
+    return [
+        name
+        for name, ids in id_groups.items()
+        if weather_ids.intersection(ids)
+    ]
+
+
+def snap_location(location:Location) -> Location:
+    '''Snaps a location to the center of its forecast grid cell.
+
+    The daily forecasts are effectively identical within a few kilometres,
+    the locations of a cell of FORECAST_GRID degrees share them.
+    
+    ARGS:
+        location: The location to snap.
+
+    RETURNS:
+        location: The center of the location cell.
+    '''
+    return Location(
+        lat=round(round(location.lat / grid) * grid, 6),
+        lng=round(round(location.lng / grid) * grid, 6)
+    )
+
+
 def get_daily_forecasts(
     location:Location,
     interval:Interval=None,
@@ -47,30 +104,81 @@ def get_daily_forecasts(
         max_dt = datetime.now(timezone.utc) + timedelta(days=7)
         assert interval.end <= max_dt, 'Forecasts are available for 7 days only'
 
-    url = 'https://api.openweathermap.org/data/2.5/onecall'
-    params = {
-        'lat': location.lat,
-        'lon': location.lng,
-        'appid': api_key,
-        'lang': language,
-        'units': 'metric',
-        'exclude': ','.join(['current', 'minutely', 'hourly', 'alerts'])
-    }
-    url_params = '&'.join([f"{k}={v}" for k, v in params.items()])
-    request_url = f"{url}?{url_params}"
-
-    response = requests.get(request_url)
-    data = json.loads(response.text)
+    data = fetch_daily_data(location, language)
 
     forecasts = []
     for dictionary in data['daily']:
         if interval.contains(
             datetime.fromtimestamp(dictionary['dt'])
         ) or not interval:
+            dictionary = dict(dictionary)
             dictionary['location'] = {
                 'lat': data['lat'],
                 'lng': data['lon']
             }
             forecasts.append(Forecast.from_dict(dictionary))
     
-    return forecasts
\ No newline at end of file
+    return forecasts
+
+
+def fetch_daily_data(location:Location, language:str=language) -> dict:
+    '''Gets the One Call daily data of a location, through the cache.
+
+    The data is cached by forecast grid cell and fetch period, the hour
+    with the default FORECAST_CACHE_TTL of 3600 seconds. OpenWeather
+    refreshes its daily forecasts a few times a day, the whole cell shares
+    the data fetched during the period. The error responses are not cached.
+    
+    ARGS:
+        location: The location for which to obtain the data.
+
+    RETURNS:
+        data: The One Call response data.
+    '''
+    cell = snap_location(location)
+    now = datetime.now(timezone.utc).timestamp()
+    fetch_period = int(now // forecast_cache.ttl)
+    key = (cell.lat, cell.lng, language, fetch_period)
+
+    data = forecast_cache.get(key)
+
+    if data is None:
+        data = request_daily_data(location, language)
+
+        if 'daily' in data:
+            forecast_cache.set(
+                key,
+                data,
+                ttl=(fetch_period + 1) * forecast_cache.ttl - now
+            )
+    
+    return data
+
+
+def request_daily_data(location:Location, language:str=language) -> dict:
+    '''Requests the One Call daily data of a location to OpenWeather.
+
+    The request goes through the pooled session, with the WEATHER_TIMEOUT
+    and the retries on rate limiting and server errors. Its duration,
+    retries included, is observed in the 'weather' latency histogram.
+    
+    ARGS:
+        location: The location for which to obtain the data.
+
+    RETURNS:
+        data: The One Call response data.
+    '''
+    url = 'https://api.openweathermap.org/data/2.5/onecall'
+    params = {
+        'lat': location.lat,
+        'lon': location.lng,
+        'appid': api_key,
+        'lang': language,
+        'units': 'metric',
+        'exclude': ','.join(['current', 'minutely', 'hourly', 'alerts'])
+    }
+
+    with latency.time():
+        response = session.get(url, params=params, timeout=timeout)
+    
+    return response.json()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import unittest
+
+from entities.user import User
+from entities.place import Place
+from entities.partner import Partner
+from entities.query import Query
+from entities.review import Review
+from services import database, aggregates
+
+# Avoid not found error
+from entities.solution import Solution
+
+
+class TestAggregates(unittest.TestCase):
+    '''Tests the aggregates service'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_aggregates.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
+
+
+    def test_overview_counts(self):
+        '''Tests the overview counts against the entity counts'''
+        for x in range(3):
+            user = User.generate_random()
+            user.confirmed = bool(x)
+            user_id = user.save()
+
+            query = Query.generate_random()
+            query.user_id = user_id if x else None
+            query.save()
+
+            Place.generate_random().save()
+            Review.generate_random().save()
+
+        Partner.generate_random().save()
+
+        counts = aggregates.get_overview_counts()
+
+        self.assertEqual(
+            counts['users']['total_count'],
+            User.get_count({'role': 'user'})
+        )
+        self.assertEqual(
+            counts['users']['confirmed_count'],
+            User.get_count({'role': 'user', 'confirmed': True})
+        )
+        self.assertEqual(counts['users']['confirmed_count'], 2)
+        self.assertEqual(counts['queries']['total_count'], Query.get_count())
+        self.assertEqual(
+            counts['queries']['anonymous_count'],
+            Query.get_count({'user_id': None})
+        )
+        self.assertEqual(counts['queries']['anonymous_count'], 1)
+        self.assertEqual(counts['places']['total_count'], 3)
+        self.assertEqual(counts['partners']['total_count'], 1)
+        self.assertEqual(counts['reviews']['total_count'], Review.get_count())
+
+
+    def test_repair_migrated(self):
+        '''Tests that adding the aggregate columns repairs them'''
+        place_id = Place.generate_random().save()
+
+        for rating in [2, 4]:
+            review = Review.generate_random()
+            review.place_id = place_id
+            review.rating = rating
+            review.save()
+
+        with database.get_engine().begin() as connection:
+            for column in ['rating_sum', 'review_count', 'query_count']:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE place DROP COLUMN {column}"
+                )
+
+        self.assertEqual(aggregates.repair_migrated(['place.location_lat']), {})
+
+        migrated = database.create_schema()
+        repaired = aggregates.repair_migrated(migrated)
+
+        self.assertIn('place.review_count', migrated)
+        self.assertEqual(repaired['places'], 1)
+
+        place = Place.get_from_id(place_id)
+        self.assertEqual(place.review_count, 2)
+        self.assertEqual(place.average_rating, 3)
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        database.reset()
+        self.delete_db()
@@ -0,0 +1,79 @@
+import os
+import unittest
+from dataclasses import dataclass
+
+from utils import app
+from app import create_app
+from services import database
+
+
+@dataclass
+class Row:
+    '''Entity stub holding only an id'''
+    id:int
+
+
+class TestApp(unittest.TestCase):
+    '''Tests the app utilities'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_app.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        self.app = create_app()
+
+
+    def test_get_page(self):
+        '''Tests the default and maximum page limits'''
+        with self.app.test_request_context():
+            self.assertEqual(
+                app.get_page({}),
+                {'limit': app.page_size, 'after': None}
+            )
+            self.assertEqual(
+                app.get_page({'limit': app.max_page_size + 1, 'after': '3'}),
+                {'limit': app.max_page_size, 'after': 3}
+            )
+            self.assertEqual(app.get_page({'limit': '2'})['limit'], 2)
+
+
+    def test_page_response(self):
+        '''Tests the next cursor given in the meta'''
+        result = [Row(id=4), Row(id=7)]
+
+        with self.app.test_request_context():
+            full_page = app.page_response(result, 2).get_json()
+            last_page = app.page_response(result, 3).get_json()
+
+        self.assertEqual(full_page['meta'], {'next_cursor': 7, 'limit': 2})
+        self.assertEqual(last_page['meta'], {'next_cursor': None, 'limit': 3})
+
+
+    def test_error_response(self):
+        '''Tests that the errors without HTTP code give a server error'''
+        error = Exception('Database error')
+        error.code = 'e3q8'
+
+        with self.app.test_request_context():
+            response = app.response(None, error)
+
+        self.assertEqual(response.status_code, 500)
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        database.reset()
+        self.delete_db()
@@ -0,0 +1,77 @@
+import os
+import time
+import unittest
+
+from utils.cache import Cache
+
+
+class TestCache(unittest.TestCase):
+    '''Tests the cache utility'''
+
+    def delete_db(self):
+        '''Delete test cache file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_cache.sqlite'
+        )
+
+        self.delete_db()
+
+
+    def test_lru(self):
+        '''Tests the eviction of the least recently used entries'''
+        cache = Cache('test_lru', max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.75)
+
+
+    def test_ttl(self):
+        '''Tests the expiration of the entries'''
+        cache = Cache('test_ttl', ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=0.05)
+
+        time.sleep(0.1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+
+    def test_persistence(self):
+        '''Tests that the entries survive in the SQLite file'''
+        cache = Cache('test_persistence', path=self.db_path)
+        cache.set(('key', 1), {'value': [1, 2]})
+        cache.set('expired', 1, ttl=0)
+
+        cache = Cache('test_persistence', path=self.db_path)
+        self.assertEqual(cache.get(('key', 1)), {'value': [1, 2]})
+        self.assertIsNone(cache.get('expired'))
+
+        cache.delete(('key', 1))
+        cache = Cache('test_persistence', path=self.db_path)
+        self.assertIsNone(cache.get(('key', 1)))
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test cache file'''
+        self.delete_db()
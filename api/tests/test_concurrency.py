@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+from random import random
+
+from utils.concurrency import map_concurrently, SingleFlight
+
+
+class TestConcurrency(unittest.TestCase):
+    '''Tests the concurrency utility'''
+
+    def test_map_concurrently(self):
+        '''Tests the results order and the concurrency bound'''
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def square(x):
+            with lock:
+                running.append(x)
+                max_running.append(len(running))
+
+            time.sleep(random() / 100)
+
+            with lock:
+                running.remove(x)
+
+            return x * x
+
+        results = map_concurrently(square, range(20), max_workers=4)
+
+        self.assertEqual(results, [x * x for x in range(20)])
+        self.assertLessEqual(max(max_running), 4)
+        self.assertGreater(max(max_running), 1)
+
+
+    def test_exception(self):
+        '''Tests that the exceptions of the calls are raised again'''
+        def invert(x):
+            return 1 / x
+
+        with self.assertRaises(ZeroDivisionError):
+            map_concurrently(invert, [1, 0, 2], max_workers=2)
+
+
+    def test_single_flight(self):
+        '''Tests that the concurrent calls with a key run once'''
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def search():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ['solution']
+
+        def run():
+            results.append(flights.do('query', search, timeout=5))
+
+        threads = [threading.Thread(target=run) for x in range(5)]
+        threads[0].start()
+        started.wait(5)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        # The waiting calls time out if the running one is too slow
+        with self.assertRaises(TimeoutError):
+            flights.do('query', search, timeout=0.01)
+
+        time.sleep(0.1)
+        release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertCountEqual(
+            [shared for result, shared in results],
+            [False, True, True, True, True]
+        )
+        self.assertTrue(all(
+            result == ['solution']
+            for result, shared in results
+        ))
+        self.assertEqual(flights.do('query', lambda: [], timeout=5), ([], False))
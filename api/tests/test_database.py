@@ -0,0 +1,135 @@
+import os
+import unittest
+
+from sqlalchemy import inspect
+
+from entities.place import Place, PlaceRow
+from entities.partner import Partner
+from entities.query import Query
+from entities.solution import Solution
+from services import database
+from app import create_app
+
+
+class TestDatabase(unittest.TestCase):
+    '''Tests the database service'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_database.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+
+
+    def test_engine_registry(self):
+        '''Tests that engines and session classes are created once per URL'''
+        engine = database.get_engine()
+        Session = database.create_session()
+
+        self.assertIs(database.get_engine(), engine)
+        self.assertIs(database.create_session(), Session)
+        self.assertIs(Session.kw['bind'], engine)
+
+
+    def test_reset(self):
+        '''Tests that the registry is emptied on reset'''
+        engine = database.get_engine()
+        database.reset()
+
+        self.assertIsNot(database.get_engine(), engine)
+
+
+    def test_create_schema(self):
+        '''Tests the schema creation and the migration of missing columns'''
+        engine = database.get_engine()
+        self.assertNotIn('place', inspect(engine).get_table_names())
+
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE TABLE place (id INTEGER PRIMARY KEY, name VARCHAR(255))'
+            )
+
+        migrated = database.create_schema()
+        self.assertIn('place.location_lat', migrated)
+        self.assertIn('user', inspect(engine).get_table_names())
+
+        place = Place.generate_random()
+        self.assertEqual(Place.get_from_id(place.save()), place)
+
+        self.assertListEqual(database.create_schema(), [])
+
+
+    def test_init_db_command(self):
+        '''Tests that init-db reports the migration made at app creation'''
+        with database.get_engine().begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE TABLE place (id INTEGER PRIMARY KEY, name VARCHAR(255))'
+            )
+
+        output = create_app().test_cli_runner().invoke(args=['init-db']).output
+
+        self.assertIn('Added place.location_lat', output)
+        self.assertIn('Repaired 0 places', output)
+        self.assertIn('Schema up to date', output)
+
+
+    def test_request_session(self):
+        '''Tests that entity calls share the request session and transaction'''
+        database.create_schema()
+
+        session = database.begin_request_session()
+        place_id = Place.generate_random().save()
+
+        with database.session_scope() as db_session:
+            self.assertIs(db_session, session)
+
+        self.assertIsNotNone(Place.get_from_id(place_id))
+
+        database.end_request_session(rollback=True)
+        self.assertIsNone(Place.get_from_id(place_id))
+
+        database.begin_request_session()
+        place_id = Place.generate_random().save()
+        database.end_request_session()
+
+        self.assertIsNotNone(Place.get_from_id(place_id))
+
+
+    def test_commit_request_session(self):
+        '''Tests the intermediate commits and the failed request sessions'''
+        database.create_schema()
+
+        database.begin_request_session()
+        place_id = Place.generate_random().save()
+        database.commit_request_session()
+        database.end_request_session(rollback=True)
+
+        self.assertIsNotNone(Place.get_from_id(place_id))
+
+        session = database.begin_request_session()
+        session.expunge_all()
+        session.add(PlaceRow(id=place_id, name='Duplicate'))
+
+        with self.assertRaises(Exception):
+            session.flush()
+
+        self.assertFalse(session.is_active)
+        database.end_request_session()
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        database.reset()
+        self.delete_db()
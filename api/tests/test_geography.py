@@ -1,13 +1,40 @@
+import os
 import unittest
+from datetime import timedelta
+from unittest import mock
 
 from entities.query import Query
 from entities.place import Place
-from services import geography
+from services import database, geography
+
+# Avoid not found error
+from entities.user import User
+from entities.partner import Partner
+from entities.solution import Solution
 
 
 class TestGeography(unittest.TestCase):
     '''Tests the geography service'''
 
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_geography.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
+
     def test_geography_fetch_places_nearby(self):
         '''Tests the geography nearby search'''
         query = Query.generate_random()
@@ -25,4 +52,9 @@ class TestGeography(unittest.TestCase):
             start_location=query.location,
             end_location=place.location,
             departure_time=query.interval.start
-        )
\ No newline at end of file
+        )
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        database.reset()
+        self.delete_db()
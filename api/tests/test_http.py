@@ -0,0 +1,55 @@
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from utils.http import create_session
+
+
+class TestHTTP(unittest.TestCase):
+    '''Tests the HTTP utility'''
+
+    def setUp(self):
+        '''Start a local server answering the statuses in self.statuses'''
+        self.statuses = []
+        self.requests = 0
+        test = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                test.requests += 1
+                status = test.statuses.pop(0) if test.statuses else 200
+
+                self.send_response(status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+    def test_retries(self):
+        '''Tests the retries on server errors'''
+        session = create_session(retries=2, backoff=0)
+
+        self.statuses = [503, 429]
+        response = session.get(self.url, timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.requests, 3)
+
+        self.statuses = [500, 500, 500, 500]
+        response = session.get(self.url, timeout=5)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.requests, 6)
+
+
+    def tearDown(self):
+        '''Stop the local server'''
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,22 @@
+import unittest
+
+from utils.metrics import Histogram
+
+
+class TestMetrics(unittest.TestCase):
+    '''Tests the metrics utility'''
+
+    def test_histogram(self):
+        '''Tests the cumulative bucket counts'''
+        histogram = Histogram('test_histogram', buckets=[1, 5])
+
+        for value in [0.5, 1, 3, 10]:
+            histogram.observe(value)
+
+        with histogram.time():
+            pass
+
+        stats = histogram.get_stats()
+        self.assertEqual(stats['count'], 5)
+        self.assertEqual(stats['buckets'], [[1, 3], [5, 4], ['+Inf', 5]])
+        self.assertGreaterEqual(stats['sum'], 14.5)
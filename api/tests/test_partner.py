@@ -3,6 +3,7 @@ import unittest
 
 from entities.partner import Partner
 from entities.location import Location
+from services import database
 
 
 class TestPartner(unittest.TestCase):
@@ -24,6 +25,8 @@ class TestPartner(unittest.TestCase):
         self.delete_db()
         
         os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
 
 
     def test_create(self):
@@ -75,4 +78,5 @@ class TestPartner(unittest.TestCase):
 
     def tearDown(self):
         '''Finalise the test removing the test database file'''
+        database.reset()
         self.delete_db()
\ No newline at end of file
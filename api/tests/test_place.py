@@ -1,7 +1,12 @@
 import os
 import unittest
 
+from sqlalchemy import event
+
 from entities.place import Place
+from entities.query import Query
+from entities.review import Review
+from services import database
 
 
 class TestPlace(unittest.TestCase):
@@ -23,6 +28,8 @@ class TestPlace(unittest.TestCase):
         self.delete_db()
         
         os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
 
 
     def test_create(self):
@@ -69,6 +76,93 @@ class TestPlace(unittest.TestCase):
         self.assertIsNone(retrieved_place_2)
 
 
+    def test_stats(self):
+        '''Tests the statistics loaded together with the places'''
+        place = Place.generate_random()
+        place_id = place.save()
+        Place.generate_random().save()
+
+        for rating in [2, 5]:
+            review = Review.generate_random()
+            review.rating = rating
+            review.place_id = place_id
+            review.save()
+
+        query = Query.generate_random()
+        query.save()
+        query.associate_place_row(place_id=place_id)
+
+        retrieved_place = Place.get_from_id(place_id)
+        self.assertEqual(retrieved_place.review_count, 2)
+        self.assertEqual(retrieved_place.average_rating, 3.5)
+        self.assertEqual(retrieved_place.query_count, 1)
+
+        review.rating = 3
+        review.save()
+        self.assertEqual(Place.get_from_id(place_id).average_rating, 2.5)
+
+        review.delete()
+        self.assertEqual(Place.get_from_id(place_id).review_count, 1)
+
+        query.delete()
+        self.assertEqual(Place.get_from_id(place_id).query_count, 0)
+
+        with database.session_scope() as db_session:
+            database.increment(db_session, 'place', place_id, review_count=5)
+
+        self.assertEqual(Place.get_from_id(place_id).review_count, 6)
+        Place.repair_stats()
+
+        retrieved_place = Place.get_from_id(place_id)
+        self.assertEqual(retrieved_place.review_count, 1)
+        self.assertEqual(retrieved_place.average_rating, 2)
+
+        statements = []
+        def count_statement(*args):
+            statements.append(args)
+
+        engine = database.get_engine()
+        event.listen(engine, 'before_cursor_execute', count_statement)
+
+        try:
+            places = Place.get_all()
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_statement)
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn(retrieved_place, places)
+
+
+    def test_get_many(self):
+        '''Tests the loading of places by ids in input order and chunks'''
+        place_ids = [Place.generate_random().save() for x in range(5)]
+        ids = list(reversed(place_ids)) + [0, place_ids[0]]
+
+        statements = []
+        def count_statement(*args):
+            statements.append(args)
+
+        engine = database.get_engine()
+        event.listen(engine, 'before_cursor_execute', count_statement)
+        max_bound_ids = database.MAX_BOUND_IDS
+
+        try:
+            database.MAX_BOUND_IDS = 2
+            places = Place.get_many(ids)
+        finally:
+            database.MAX_BOUND_IDS = max_bound_ids
+            event.remove(engine, 'before_cursor_execute', count_statement)
+
+        # 6 unique ids in chunks of 2
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            places,
+            [Place.get_from_id(id) for id in reversed(place_ids)]
+            + [None, Place.get_from_id(place_ids[0])]
+        )
+
+
     def tearDown(self):
         '''Finalise the test removing the test database file'''
+        database.reset()
         self.delete_db()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import threading
+import unittest
+
+from entities.place import Place
+from entities.query import Query
+from entities.location import Location
+from services import database, geography, place_index
+
+# Avoid not found error
+from entities.user import User
+from entities.partner import Partner
+from entities.solution import Solution
+
+
+class TestPlaceIndex(unittest.TestCase):
+    '''Tests the place index service'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def get_distances(self, location, places):
+        '''Gets the distances to places, to compare orders with ties'''
+        return [
+            round(geography.get_distance(location, place.location), 3)
+            for place in places
+        ]
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_place_index.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
+
+        for x in range(30):
+            Place.generate_random().save()
+
+
+    def test_within_radius(self):
+        '''Tests the radius query against the distance filter'''
+        query = Query.generate_random()
+
+        expected_places = geography.filter_places_by_distance(
+            query.location,
+            Place.get_all(),
+            query.radius
+        )
+        places = place_index.within_radius(query.location, query.radius)
+
+        self.assertCountEqual(places, expected_places)
+        self.assertEqual(
+            self.get_distances(query.location, places),
+            self.get_distances(query.location, expected_places)
+        )
+
+
+    def test_nearest(self):
+        '''Tests the nearest query against the distance order'''
+        query = Query.generate_random()
+
+        expected_places = geography.filter_places_by_distance(
+            query.location,
+            Place.get_all()
+        )
+        places = place_index.nearest(query.location, 5)
+
+        self.assertEqual(
+            self.get_distances(query.location, places),
+            self.get_distances(query.location, expected_places[:5])
+        )
+        self.assertEqual(len(place_index.nearest(query.location, 100)), 30)
+
+
+    def test_invalidation(self):
+        '''Tests that saving and deleting places updates the index'''
+        location = Location(lat=0, lng=0)
+        place_index.nearest(location, 1)
+
+        place = Place.generate_random()
+        place.location = location
+        place.save()
+
+        self.assertEqual(place_index.nearest(location, 1), [place])
+
+        place.delete()
+        self.assertNotIn(place, place_index.nearest(location, 100))
+
+
+    def test_commit_invalidation(self):
+        '''Tests that an index built before a place commit becomes stale'''
+        location = Location(lat=0, lng=0)
+        indexes = []
+
+        database.begin_request_session()
+
+        place = Place.generate_random()
+        place.location = location
+        place.save()
+
+        # Another request rebuilds the index before the commit
+        thread = threading.Thread(
+            target=lambda: indexes.append(place_index.get_index())
+        )
+        thread.start()
+        thread.join()
+
+        self.assertNotIn(place.id, indexes[0].ids)
+
+        database.end_request_session()
+
+        self.assertNotEqual(place_index.get_generation(), indexes[0].generation)
+        self.assertEqual(place_index.nearest(location, 1), [place])
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        database.reset()
+        self.delete_db()
@@ -7,6 +7,7 @@ from entities.relations import QueryPlaceRow, QueryPartnerRow
 from entities.user import User
 from entities.place import Place
 from entities.partner import Partner
+from services import database
 
 
 class TestQuery(unittest.TestCase):
@@ -47,6 +48,8 @@ class TestQuery(unittest.TestCase):
         self.delete_db()
         
         os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
 
 
     def test_create(self):
@@ -127,4 +130,5 @@ class TestQuery(unittest.TestCase):
 
     def tearDown(self):
         '''Finalise the test removing the test database file'''
+        database.reset()
         self.delete_db()
\ No newline at end of file
@@ -1,10 +1,17 @@
 import os
 import unittest
 
+from sqlalchemy import event
+
 from entities.user import User
 from entities.place import Place
 from entities.partner import Partner
 from entities.review import Review
+from services import database
+
+# Avoid not found error
+from entities.query import Query
+from entities.solution import Solution
 
 
 class TestReview(unittest.TestCase):
@@ -52,6 +59,8 @@ class TestReview(unittest.TestCase):
         self.delete_db()
         
         os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
 
 
     def test_create(self):
@@ -135,6 +144,50 @@ class TestReview(unittest.TestCase):
         self.assertIsNone(retrieved_review_2)
 
 
+    def test_get_all_names(self):
+        '''Tests the names loaded with the reviews in constant statements'''
+        statement_counts = []
+        row_counts = []
+
+        for review_count in [1, 5]:
+            for x in range(review_count):
+                self.create_review_with_relations()
+
+            statements = []
+            def count_statement(*args):
+                statements.append(args)
+
+            engine = database.get_engine()
+            event.listen(engine, 'before_cursor_execute', count_statement)
+
+            try:
+                reviews = Review.get_all()
+            finally:
+                event.remove(engine, 'before_cursor_execute', count_statement)
+
+            statement_counts.append(len(statements))
+            row_counts.append(len(reviews))
+
+        # Each call creates a review and its parent
+        self.assertEqual(row_counts, [2, 12])
+        self.assertEqual(statement_counts, [1, 1])
+
+        for retrieved_review in reviews:
+            self.assertEqual(
+                retrieved_review.user_name,
+                User.get_from_id(retrieved_review.user_id).name
+            )
+            self.assertEqual(
+                retrieved_review.partner_name,
+                Partner.get_from_id(retrieved_review.partner_id).name
+            )
+            self.assertEqual(
+                retrieved_review.place_name,
+                Place.get_from_id(retrieved_review.place_id).name
+            )
+
+
     def tearDown(self):
         '''Finalise the test removing the test database file'''
+        database.reset()
         self.delete_db()
\ No newline at end of file
@@ -0,0 +1,346 @@
+import json
+import os
+import threading
+import time as timer
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import create_app
+from entities.location import Location
+from entities.place import Place
+from entities.query import QueryRow
+from entities.itinerary import Itinerary
+from entities.solution import Solution
+from factories.solution_factory import SolutionFactory
+from services import database, search_cache, search_jobs
+from utils import time
+
+
+class TestSearch(unittest.TestCase):
+    '''Tests the search routes'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_search.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        search_cache.cache.clear()
+
+        self.client = create_app().test_client()
+
+        start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        self.body = {
+            'location': {'lat': 46.5, 'lng': 6.6},
+            'interval': {
+                'start': start.strftime(time.datetime_format()),
+                'end': (start + timedelta(hours=8)).strftime(
+                    time.datetime_format()
+                )
+            },
+            'radius': 10000,
+            'types': ['hike'],
+            'max_travel': '1:00:00',
+            'max_walk': '0:30:00',
+            'weather_ids': [800]
+        }
+
+
+    def create_places(self, count:int) -> list:
+        '''Saves places near the search location'''
+        places = []
+
+        for x in range(count):
+            place = Place.generate_random()
+            place.location = Location(lat=46.5 + x * 0.001, lng=6.6)
+            place.duration = timedelta(hours=1)
+            place.save()
+            places.append(place)
+
+        return places
+
+
+    def create_solution(self, factory, place):
+        '''Creates a solution of a factory query to reach a place'''
+        query = factory.query
+        itinerary = Itinerary(
+            start_location=query.location,
+            end_location=place.location,
+            interval=query.interval,
+            distance=1000,
+            bounds=None,
+            copyrights=None,
+            fare=None,
+            legs=[{'steps': [{
+                'travel_mode': 'WALKING',
+                'duration': {'value': 600}
+            }]}],
+            overview_path=None,
+            overview_polyline=None,
+            summary=None,
+            warnings=None,
+            waypoint_order=None
+        )
+
+        return Solution(
+            start_location=query.location,
+            interval=query.interval,
+            outward_itinerary=itinerary,
+            return_itinerary=itinerary,
+            forecasts=[],
+            query_id=query.id,
+            place_id=place.id,
+            place=place
+        )
+
+
+    def get_lines(self, response) -> list:
+        '''Parses the lines of an NDJSON response'''
+        return [
+            json.loads(line)
+            for line in response.get_data(as_text=True).splitlines()
+        ]
+
+
+    def test_stream(self):
+        '''Tests the streamed solutions and their cached replay'''
+        places = self.create_places(2)
+        streams = []
+
+        def stream(factory, on_batch=None):
+            streams.append(factory)
+            factory._places = places
+
+            # The query is already committed for the other requests
+            with database.session_scope(database.get_url()) as db_session:
+                db_session.query(QueryRow).filter(
+                    QueryRow.id == factory.query.id
+                ).update({'favorited': True})
+
+            for place in places:
+                solution = self.create_solution(factory, place)
+                factory._solutions.append(solution)
+                yield solution
+
+        with mock.patch.object(SolutionFactory, 'stream', stream):
+            first_response = self.client.post('/search/stream', json=self.body)
+            first_lines = self.get_lines(first_response)
+
+            second_response = self.client.post('/search/stream', json=self.body)
+            second_lines = self.get_lines(second_response)
+
+        self.assertEqual(first_response.mimetype, 'application/x-ndjson')
+        self.assertEqual(len(streams), 1)
+
+        for lines in [first_lines, second_lines]:
+            self.assertEqual(
+                [line['result']['place']['id'] for line in lines],
+                [place.id for place in places]
+            )
+            self.assertEqual([line['error'] for line in lines], [None, None])
+
+        self.assertEqual(Solution.get_count(), 4)
+
+
+    def test_stream_error(self):
+        '''Tests that an error during the search ends the stream'''
+        def stream(factory, on_batch=None):
+            raise RuntimeError('Search failed')
+            yield
+
+        with mock.patch.object(SolutionFactory, 'stream', stream):
+            response = self.client.post('/search/stream', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_lines(response), [{
+            'result': None,
+            'error': {'type': 'RuntimeError', 'message': 'Search failed'}
+        }])
+
+
+    def test_jobs(self):
+        '''Tests the job submission, polling and expiration'''
+        def stream(factory, on_batch=None):
+            return iter([])
+
+        with mock.patch.object(SolutionFactory, 'stream', stream):
+            response = self.client.post('/search/jobs', json=self.body)
+            job_id = response.get_json()['result']['id']
+
+            self.assertEqual(response.status_code, 202)
+            self.assertIn(
+                response.get_json()['result']['status'],
+                ['queued', 'running', 'done']
+            )
+
+            for x in range(500):
+                info = self.client.get(f"/search/jobs/{job_id}").get_json()
+
+                if info['result']['status'] == 'done':
+                    break
+
+                timer.sleep(0.01)
+
+        self.assertEqual(info['result']['status'], 'done')
+        self.assertEqual(info['result']['progress'], 1)
+
+        with mock.patch.object(search_jobs, 'ttl', -1):
+            response = self.client.get(f"/search/jobs/{job_id}")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            self.client.get('/search/jobs/unknown').status_code,
+            404
+        )
+
+
+    def test_jobs_full(self):
+        '''Tests that the jobs are refused when the queue is full'''
+        with mock.patch.object(search_jobs, 'max_jobs', 0):
+            response = self.client.post('/search/jobs', json=self.body)
+
+        self.assertEqual(response.status_code, 429)
+
+
+    def test_search_cache(self):
+        '''Tests that an identical search is served from the cache'''
+        streams = []
+
+        def stream(factory):
+            streams.append(factory)
+            return iter([])
+
+        with mock.patch.object(SolutionFactory, 'stream', stream):
+            first_response = self.client.post('/search', json=self.body)
+            second_response = self.client.post('/search', json=self.body)
+
+        self.assertEqual(first_response.status_code, 200)
+        self.assertEqual(second_response.status_code, 200)
+        self.assertEqual(second_response.get_json()['result'], [])
+        self.assertEqual(len(streams), 1)
+
+
+    def test_search_coalescing(self):
+        '''Tests that concurrent identical searches share one execution'''
+        streams = []
+        flights = []
+        do = search_cache.flights.do
+
+        def flight(*args):
+            flights.append(args[0])
+            return do(*args)
+
+        def stream(factory):
+            streams.append(factory)
+
+            # Lets the second search join the running one
+            for x in range(500):
+                if len(flights) > 1:
+                    break
+
+                timer.sleep(0.01)
+
+            timer.sleep(0.1)
+            return iter([])
+
+        responses = []
+
+        def search():
+            responses.append(self.client.post('/search', json=self.body))
+
+        with mock.patch.object(SolutionFactory, 'stream', stream), \
+            mock.patch.object(search_cache.flights, 'do', flight):
+            threads = [threading.Thread(target=search) for x in range(2)]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        metas = sorted(
+            [response.get_json()['meta'] for response in responses],
+            key=lambda meta: meta['shared']
+        )
+
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [200, 200]
+        )
+        self.assertEqual(len(streams), 1)
+        self.assertEqual([meta['shared'] for meta in metas], [False, True])
+
+
+    def test_search_releases_database(self):
+        '''Tests that the query is committed before the search starts'''
+        def stream(factory):
+            with database.session_scope(database.get_url()) as db_session:
+                db_session.query(QueryRow).filter(
+                    QueryRow.id == factory.query.id
+                ).update({'favorited': True})
+
+            return iter([])
+
+        with mock.patch.object(SolutionFactory, 'stream', stream):
+            response = self.client.post('/search', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+
+        with database.session_scope() as db_session:
+            self.assertEqual(
+                db_session.query(QueryRow).filter_by(favorited=True).count(),
+                1
+            )
+
+
+    def test_deadline(self):
+        '''Tests that a search past its deadline reports partial results'''
+        self.create_places(4)
+
+        response = self.client.post(
+            '/search',
+            json={**self.body, 'deadline_ms': 1}
+        )
+        meta = response.get_json()['meta']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['result'], [])
+        self.assertTrue(meta['partial'])
+        self.assertIn('places', meta['timings'])
+        self.assertFalse(meta['cached'])
+
+
+    def test_invalid_deadline(self):
+        '''Tests that the searches refuse an invalid deadline_ms'''
+        for deadline_ms in ['abc', -1, 1.5, True]:
+            body = {**self.body, 'deadline_ms': deadline_ms}
+
+            for path in ['/search', '/search/stream']:
+                response = self.client.post(path, json=body)
+                self.assertEqual(response.status_code, 400)
+
+        body = {**self.body, 'deadline_ms': '200'}
+
+        with mock.patch.object(SolutionFactory, 'stream', lambda factory: iter([])):
+            response = self.client.post('/search', json=body)
+
+        self.assertEqual(response.status_code, 200)
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        search_cache.cache.clear()
+        database.reset()
+        self.delete_db()
@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+import unittest
+from copy import deepcopy
+from datetime import timedelta
+from math import pi
+from types import SimpleNamespace
+
+from entities.query import Query
+from entities.place import Place
+from entities.location import Location
+from services import database, search_cache
+from services.geography import EARTH_RADIUS
+
+# Avoid not found error
+from entities.user import User
+from entities.partner import Partner
+from entities.solution import Solution
+
+
+class TestSearchCache(unittest.TestCase):
+    '''Tests the search cache service'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_search_cache.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
+        search_cache.cache.clear()
+
+        # Snapped to the center of a grid cell and the start of a time bucket
+        self.query = Query.generate_random()
+        cell_size = search_cache.grid / (EARTH_RADIUS * pi/180.0)
+        self.query.location = Location(
+            lat=round(self.query.location.lat / cell_size) * cell_size,
+            lng=round(self.query.location.lng / cell_size) * cell_size
+        )
+        self.query.interval.start -= timedelta(
+            seconds=self.query.interval.start.timestamp() % search_cache.bucket
+        )
+
+
+    def test_fingerprint(self):
+        '''Tests that only the close and equivalent queries share it'''
+        query = self.query
+        similar_query = deepcopy(query)
+        similar_query.location.lat += 0.0001
+        similar_query.interval.start += timedelta(seconds=60)
+        similar_query.weather_ids = list(reversed(query.weather_ids))
+
+        other_query = deepcopy(query)
+        other_query.max_walk += timedelta(minutes=30)
+
+        self.assertEqual(
+            search_cache.get_fingerprint(query),
+            search_cache.get_fingerprint(similar_query)
+        )
+        self.assertNotEqual(
+            search_cache.get_fingerprint(query),
+            search_cache.get_fingerprint(other_query)
+        )
+
+
+    def test_solutions(self):
+        '''Tests the cached solutions and their invalidation'''
+        query = self.query
+        query.id = 1
+
+        solution = SimpleNamespace(
+            id=1,
+            created=None,
+            updated=None,
+            query_id=1,
+            user_id=None,
+            place_id=1
+        )
+        search_cache.set_solutions(query, [solution])
+
+        other_query = deepcopy(query)
+        other_query.id = 2
+        solutions = search_cache.get_solutions(other_query)
+
+        self.assertEqual(len(solutions), 1)
+        self.assertIsNone(solutions[0].id)
+        self.assertEqual(solutions[0].query_id, 2)
+        self.assertEqual(solutions[0].place_id, solution.place_id)
+        self.assertEqual(solution.query_id, 1)
+
+        Place.generate_random().save()
+
+        self.assertIsNone(search_cache.get_solutions(other_query))
+
+
+    def test_get_or_execute(self):
+        '''Tests that a complete executed search is served from the cache'''
+        query = self.query
+        query.id = 1
+        executions = []
+
+        def execute():
+            executions.append(1)
+            return [SimpleNamespace(
+                id=None,
+                created=None,
+                updated=None,
+                query_id=1,
+                user_id=None,
+                place_id=1
+            )], {
+                'partial': len(executions) == 1,
+                'timings': {'itineraries': len(executions)}
+            }
+
+        other_query = deepcopy(query)
+        other_query.id = 2
+
+        # The first execution is partial, so it is not cached
+        solutions, report = search_cache.get_or_execute(query, execute)
+
+        self.assertTrue(report['partial'])
+        self.assertEqual(solutions[0].query_id, 1)
+
+        search_cache.get_or_execute(query, execute)
+        other_solutions, report = search_cache.get_or_execute(
+            other_query,
+            execute
+        )
+
+        # The cached solutions keep the report of the execution
+        self.assertEqual(len(executions), 2)
+        self.assertEqual(report, {
+            'partial': False,
+            'timings': {'itineraries': 2},
+            'cached': True,
+            'shared': False
+        })
+        self.assertEqual(other_solutions[0].query_id, 2)
+
+
+    def test_flight_key(self):
+        '''Tests that only the queries with the same deadline share a flight'''
+        query = self.query
+        hurried_query = deepcopy(query)
+        hurried_query.deadline_ms = 200
+
+        self.assertEqual(
+            search_cache.get_key(query),
+            search_cache.get_key(hurried_query)
+        )
+        self.assertNotEqual(
+            search_cache.get_flight_key(query),
+            search_cache.get_flight_key(hurried_query)
+        )
+
+
+    def test_shared_report(self):
+        '''Tests that a coalesced search gets the report of the execution'''
+        query = self.query
+        query.deadline_ms = 500
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def execute():
+            started.set()
+            release.wait(5)
+            return [], {'partial': True, 'timings': {'forecasts': 7}}
+
+        def search():
+            results.append(search_cache.get_or_execute(query, execute))
+
+        leader = threading.Thread(target=search)
+        leader.start()
+        started.wait(5)
+
+        follower = threading.Thread(target=search)
+        follower.start()
+        time.sleep(0.1)
+        release.set()
+
+        leader.join()
+        follower.join()
+
+        reports = sorted(
+            [report for solutions, report in results],
+            key=lambda report: report['shared']
+        )
+
+        self.assertEqual(reports[1], {
+            'partial': True,
+            'timings': {'forecasts': 7},
+            'cached': False,
+            'shared': True
+        })
+        self.assertFalse(reports[0]['shared'])
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        search_cache.cache.clear()
+        database.reset()
+        self.delete_db()
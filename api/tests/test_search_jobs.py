@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+import unittest
+from datetime import timedelta
+from functools import partial
+from queue import Full
+from types import SimpleNamespace
+from unittest import mock
+
+from entities.query import Query
+from entities.interval import Interval
+from entities.location import Location
+from factories.solution_factory import SolutionFactory
+from services import database, search_cache, search_jobs
+
+# Avoid not found error
+from entities.user import User
+from entities.place import Place
+from entities.partner import Partner
+from entities.solution import Solution
+
+
+class FakeFactory:
+    '''Solution factory streaming one solution once released'''
+    release = threading.Event()
+
+    def __init__(self, query):
+        self.places = [SimpleNamespace(id=1)]
+        self.processed_count = 0
+        self.partial = False
+
+    def get_report(self):
+        return {'partial': self.partial, 'timings': {}}
+
+    def stream(self, on_batch=None):
+        self.release.wait(5)
+        self.processed_count = 1
+        on_batch(1, 1)
+
+        yield SimpleNamespace(
+            id=None,
+            created=None,
+            updated=None,
+            query_id=None,
+            user_id=None,
+            place_id=1,
+            place=None,
+            save=lambda: 1
+        )
+
+
+class TestSearchJobs(unittest.TestCase):
+    '''Tests the search jobs service'''
+
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+
+    def setUp(self):
+        '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_search_jobs.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
+        search_cache.cache.clear()
+        FakeFactory.release.clear()
+
+
+    def test_submit(self):
+        '''Tests the job results and the queue bound'''
+        with mock.patch.object(search_jobs, 'SolutionFactory', FakeFactory), \
+            mock.patch.object(search_jobs, 'max_jobs', 1):
+            job = search_jobs.submit(Query.generate_random())
+
+            with self.assertRaises(Full):
+                search_jobs.submit(Query.generate_random())
+
+            self.assertIs(search_jobs.get_job(job.id), job)
+            self.assertIn(job.get_info()['status'], ['queued', 'running'])
+
+            FakeFactory.release.set()
+
+            for x in range(500):
+                if job.finished is not None:
+                    break
+
+                time.sleep(0.01)
+
+        info = job.get_info()
+
+        self.assertEqual(info['status'], 'done')
+        self.assertEqual(info['progress'], 1)
+        self.assertFalse(info['partial'])
+        self.assertEqual(
+            [solution.place_id for solution in info['solutions']],
+            [1]
+        )
+        self.assertIsNotNone(job.query.id)
+        self.assertIsNone(search_jobs.get_job('unknown'))
+
+
+    def test_progress(self):
+        '''Tests that the progress advances when no solution is accepted'''
+        query = Query.generate_random()
+        query.radius = 10000
+        query.interval = Interval(
+            start=query.interval.start,
+            end=query.interval.start + timedelta(hours=10)
+        )
+
+        for x in range(4):
+            place = Place.generate_random()
+            place.location = Location(
+                lat=query.location.lat + x * 0.001,
+                lng=query.location.lng
+            )
+            place.duration = None
+            place.save()
+
+        job = search_jobs.Job(query)
+        progresses = []
+
+        def run_stages(factory, places):
+            progresses.append(job.progress)
+            return []
+
+        with mock.patch.object(
+            search_jobs,
+            'SolutionFactory',
+            partial(SolutionFactory, concurrency=2)
+        ), mock.patch.object(SolutionFactory, '_run_stages', run_stages):
+            job.run()
+
+        self.assertEqual(progresses, [0, 0.5])
+        self.assertEqual(job.progress, 1)
+        self.assertEqual(job.solutions, [])
+
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        search_cache.cache.clear()
+        database.reset()
+        self.delete_db()
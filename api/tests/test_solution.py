@@ -1,12 +1,20 @@
 import os
+from datetime import datetime, timedelta
 from random import randrange
 import unittest
+from types import SimpleNamespace
+
+from sqlalchemy import event
 
 from entities.solution import Solution
+from entities.place import Place
+from entities.location import Location
+from entities.interval import Interval
 from entities.relations import SolutionPartnerRow
 from entities.query import Query
 from entities.partner import Partner
 from entities.user import User
+from services import database
 
 
 class TestSolution(unittest.TestCase):
@@ -47,6 +55,8 @@ class TestSolution(unittest.TestCase):
         self.delete_db()
         
         os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
     
 
     def test_create(self):
@@ -124,6 +134,80 @@ class TestSolution(unittest.TestCase):
         self.assertIsNone(etrieved_ssolution_2)
 
 
+    def test_attach_places(self):
+        '''Tests the places of the solutions, loaded only when unknown'''
+        places = [Place.generate_random() for x in range(3)]
+
+        for place in places:
+            place.save()
+
+        solutions = [
+            SimpleNamespace(place_id=place.id, place=None)
+            for place in [places[2], places[0], places[1], places[0]]
+        ]
+
+        Solution.attach_places(solutions)
+        self.assertEqual(
+            [solution.place.id for solution in solutions],
+            [places[2].id, places[0].id, places[1].id, places[0].id]
+        )
+
+        known_place = places[0]
+        Solution.attach_places(solutions, [known_place])
+        self.assertIs(solutions[1].place, known_place)
+        self.assertIs(solutions[3].place, known_place)
+        self.assertEqual(solutions[0].place.id, places[2].id)
+
+
+    def test_get_all_places(self):
+        '''Tests the places loaded with the solutions in constant statements'''
+        itinerary = SimpleNamespace(
+            walk_duration=timedelta(minutes=10),
+            travel_duration=timedelta(minutes=50)
+        )
+        statement_counts = []
+
+        for solution_count in [1, 5]:
+            for x in range(solution_count):
+                place = Place.generate_random()
+                place.duration = timedelta(hours=2)
+
+                Solution(
+                    start_location=Location(lat=46.5, lng=6.6),
+                    interval=Interval(
+                        start=datetime(2030, 1, 1, 8),
+                        end=datetime(2030, 1, 1, 18)
+                    ),
+                    outward_itinerary=itinerary,
+                    return_itinerary=itinerary,
+                    forecasts=[],
+                    place_id=place.save()
+                ).save()
+
+            statements = []
+            def count_statement(*args):
+                statements.append(args)
+
+            engine = database.get_engine()
+            event.listen(engine, 'before_cursor_execute', count_statement)
+
+            try:
+                solutions = Solution.get_all()
+            finally:
+                event.remove(engine, 'before_cursor_execute', count_statement)
+
+            statement_counts.append(len(statements))
+
+        # One statement for the solutions and one for their places
+        self.assertEqual(statement_counts, [2, 2])
+        self.assertEqual(len(solutions), 6)
+
+        for solution in solutions:
+            self.assertEqual(solution.place.id, solution.place_id)
+            self.assertEqual(solution.info['free_time'], timedelta(hours=6))
+
+
     def tearDown(self):
         '''Finalise the test removing the test database file'''
+        database.reset()
         self.delete_db()
\ No newline at end of file
@@ -1,17 +1,260 @@
+import os
+import time
 import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
 from entities.query import Query
-from factories.solution_factory import SolutionFactory
+from entities.place import Place
+from entities.interval import Interval
+from entities.location import Location
+from factories.solution_factory import SolutionFactory, DEFAULT_COSTS
+from services import database, geography, weather
+from utils import metrics
+
+# Avoid not found error
+from entities.user import User
+from entities.partner import Partner
+from entities.solution import Solution
 
 
 class TestSolutionFactory(unittest.TestCase):
     '''Tests the solution factory'''
 
+    def delete_db(self):
+        '''Delete test database file'''
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
     def setUp(self):
         '''Initialize the test'''
+        self.db_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_solution_factory.sqlite'
+        )
+
+        self.delete_db()
+
+        os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
         self.query = Query.generate_random()
 
     def test_execute(self):
         '''Tests the solution factory execution'''
         query = self.query
-        SolutionFactory(query).execute()
\ No newline at end of file
+        SolutionFactory(query).execute()
+
+    def test_get_forecasts(self):
+        '''Tests that the forecasts are fetched once per grid cell'''
+        query = self.query
+        factory = SolutionFactory(query, concurrency=4)
+
+        places = [
+            Place(
+                id=id,
+                name='',
+                location=Location(lat=46 + lat_offset, lng=7),
+                fetch_stats=False
+            )
+            for id, lat_offset in [(1, 0), (2, 0.001), (3, 1)]
+        ]
+
+        with mock.patch.object(
+            weather,
+            'get_daily_forecasts',
+            side_effect=lambda location, interval: [location.lat]
+        ) as get_daily_forecasts:
+            forecasts = factory._get_forecasts(places)
+
+        self.assertEqual(get_daily_forecasts.call_count, 2)
+        self.assertEqual(forecasts, {1: [46], 2: [46], 3: [47]})
+
+    def test_prune_places(self):
+        '''Tests that the places out of reach are pruned before Directions'''
+        query = self.query
+        query.max_walk = timedelta(minutes=30)
+        query.max_travel = timedelta(hours=1)
+        query.interval = Interval(
+            start=query.interval.start,
+            end=query.interval.start + timedelta(hours=10)
+        )
+
+        # About 0, 100 and 300 km north, then a visit longer than the interval
+        factory = SolutionFactory(query)
+        factory._places = [
+            Place(
+                id=id,
+                name='',
+                location=Location(
+                    lat=query.location.lat + lat_offset,
+                    lng=query.location.lng
+                ),
+                duration=timedelta(hours=hours),
+                fetch_stats=False
+            )
+            for id, lat_offset, hours in [
+                (1, 0, 1),
+                (2, 0.9, 1),
+                (3, 2.7, 1),
+                (4, 0, 11)
+            ]
+        ]
+        avoided_calls = metrics.get_counters().get(
+            'search.avoided_directions_calls',
+            0
+        )
+
+        factory._prune_places()
+
+        self.assertEqual([place.id for place in factory.places], [1, 2])
+        self.assertEqual(factory.pruned_count, 2)
+        self.assertEqual(
+            metrics.get_counters()['search.avoided_directions_calls'],
+            avoided_calls + 4
+        )
+
+    def test_get_selectivities(self):
+        '''Tests that the weather selectivity is measured by weather group'''
+        query = self.query
+        query.weather_ids = weather.id_groups['clouds'] + [800]
+
+        factory = SolutionFactory(query)
+        selectivity = factory._get_selectivities()['forecasts']
+
+        self.assertEqual(selectivity.name, 'search.selectivity.forecasts.2')
+
+        if not selectivity.count:
+            self.assertAlmostEqual(
+                selectivity.value,
+                2 / len(weather.id_groups)
+            )
+
+    def test_choose_plan(self):
+        '''Tests that a restrictive weather query fetches the forecasts first'''
+        query = self.query
+        query.weather_ids = [800]
+
+        places = [
+            Place(
+                id=id,
+                name='',
+                location=Location(lat=40 + id, lng=7),
+                fetch_stats=False
+            )
+            for id in range(1, 5)
+        ]
+        selectivity = metrics.get_average('search.selectivity.forecasts.1', 0)
+        prior = selectivity.value
+        selectivity.value = 0.25
+
+        def get_call_cost(histogram, cache, service):
+            return DEFAULT_COSTS[service]
+
+        def get_daily_forecasts(location, interval):
+            weather_id = 800 if location.lat % 2 else 500
+            return [SimpleNamespace(weather=[{'id': weather_id}])]
+
+        factory = SolutionFactory(query)
+        created_places = []
+
+        with mock.patch.object(factory, '_get_call_cost', get_call_cost), \
+            mock.patch.object(
+                factory,
+                '_create_solutions',
+                side_effect=lambda places: created_places.extend(places) or []
+            ), \
+            mock.patch.object(
+                weather,
+                'get_daily_forecasts',
+                get_daily_forecasts
+            ):
+            factory._run_stages(places)
+
+            self.assertEqual(factory.plan['name'], 'forecasts_first')
+            self.assertEqual([place.id for place in created_places], [1, 3])
+
+            query.weather_ids = []
+            factory = SolutionFactory(query)
+            factory._choose_plan(places)
+
+            self.assertEqual(factory.plan['name'], 'itineraries_first')
+
+        selectivity.value = prior
+
+    def test_deadline(self):
+        '''Tests that no external call starts after the deadline'''
+        query = self.query
+        query.deadline_ms = 1000
+
+        places = [
+            Place(
+                id=id,
+                name='',
+                location=Location(lat=46 + id, lng=7),
+                fetch_stats=False
+            )
+            for id in range(1, 3)
+        ]
+        factory = SolutionFactory(query, concurrency=1)
+        factory._start_deadline()
+
+        self.assertTrue(factory._has_time_left())
+        self.assertFalse(factory.partial)
+
+        factory.deadline = time.monotonic() - 1
+
+        with mock.patch.object(geography, 'fetch_itinerary') as itinerary, \
+            mock.patch.object(weather, 'get_daily_forecasts') as forecast:
+            solutions = factory._create_solutions(places)
+            forecasts = factory._get_forecasts(places)
+
+        self.assertEqual(solutions, [])
+        self.assertEqual(forecasts, {1: None, 2: None})
+        self.assertFalse(factory._has_good_weather(forecasts[1]))
+        self.assertEqual(itinerary.call_count, 0)
+        self.assertEqual(forecast.call_count, 0)
+        self.assertTrue(factory.partial)
+        self.assertCountEqual(factory.timings, ['itineraries', 'forecasts'])
+
+    def test_stream(self):
+        '''Tests that the streaming pipeline stops at max_results'''
+        query = self.query
+        query.max_results = 3
+        query.radius = 10000
+        query.interval = Interval(
+            start=query.interval.start,
+            end=query.interval.start + timedelta(hours=10)
+        )
+
+        for x in range(10):
+            place = Place.generate_random()
+            place.location = Location(
+                lat=query.location.lat + x * 0.001,
+                lng=query.location.lng
+            )
+            place.duration = None
+            place.save()
+
+        factory = SolutionFactory(query, concurrency=2)
+        batches = []
+
+        def run_stages(places):
+            batches.append(places)
+            return [SimpleNamespace(place_id=place.id) for place in places]
+
+        with mock.patch.object(factory, '_run_stages', run_stages):
+            solutions = list(factory.stream())
+
+        self.assertEqual(len(solutions), 3)
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(
+            [place.location.lat for batch in batches for place in batch],
+            [query.location.lat + x * 0.001 for x in range(4)]
+        )
+
+    def tearDown(self):
+        '''Finalise the test removing the test database file'''
+        database.reset()
+        self.delete_db()
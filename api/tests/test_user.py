@@ -2,6 +2,7 @@ import os
 import unittest
 
 from entities.user import User
+from services import database
 
 
 class TestUser(unittest.TestCase):
@@ -23,6 +24,8 @@ class TestUser(unittest.TestCase):
         self.delete_db()
         
         os.environ['DB_ENGINE'] = f"sqlite:///{self.db_path}"
+        database.reset()
+        database.create_schema()
 
 
     def test_create(self):
@@ -102,6 +105,23 @@ class TestUser(unittest.TestCase):
         self.assertIsInstance(retrieved_user, User)
 
 
+    def test_get_all_pages(self):
+        '''Tests the keyset pagination of the users'''
+        user_ids = [User.generate_random().save() for x in range(5)]
+
+        first_page = User.get_all(limit=2)
+        self.assertEqual([user.id for user in first_page], user_ids[:2])
+
+        next_page = User.get_all(limit=2, after=first_page[-1].id)
+        self.assertEqual([user.id for user in next_page], user_ids[2:4])
+
+        last_page = User.get_all(limit=2, after=next_page[-1].id)
+        self.assertEqual([user.id for user in last_page], user_ids[4:])
+
+        self.assertEqual(len(User.get_all()), 5)
+
+
     def tearDown(self):
         '''Finalise the test removing the test database file'''
+        database.reset()
         self.delete_db()
\ No newline at end of file
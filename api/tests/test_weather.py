@@ -1,6 +1,8 @@
 import unittest
+from unittest import mock
 
 from entities.query import Query
+from entities.location import Location
 from services import weather
 
 
@@ -17,4 +19,38 @@ class TestWeather(unittest.TestCase):
         weather.get_daily_forecasts(
             location=query.location,
             interval=query.interval
-        )
\ No newline at end of file
+        )
+
+    def test_forecast_cache(self):
+        '''Tests that the locations of a grid cell share their forecasts'''
+        query = self.query
+        weather.forecast_cache.clear()
+        misses = weather.forecast_cache.misses
+
+        cell = weather.snap_location(query.location)
+        data = {'lat': cell.lat, 'lon': cell.lng, 'daily': []}
+
+        with mock.patch.object(
+            weather,
+            'request_daily_data',
+            return_value=data
+        ) as request_daily_data:
+            for offset in [0, 0.001, -0.001]:
+                weather.get_daily_forecasts(
+                    location=Location(
+                        lat=cell.lat + offset,
+                        lng=cell.lng
+                    ),
+                    interval=query.interval
+                )
+
+            self.assertEqual(request_daily_data.call_count, 1)
+
+            weather.get_daily_forecasts(
+                location=Location(lat=cell.lat + 1, lng=cell.lng),
+                interval=query.interval
+            )
+            self.assertEqual(request_daily_data.call_count, 2)
+
+        self.assertEqual(weather.forecast_cache.misses - misses, 2)
+        weather.forecast_cache.clear()
@@ -1,18 +1,26 @@
+import os
 import traceback
 import functools
 
 import flask
 import flask_jwt_extended as flask_jwt
+from dotenv import load_dotenv
 
 from entities.user import User
 
 
-def response(result=[], error=None):
+load_dotenv()
+page_size = int(os.getenv('PAGE_SIZE') or 100)
+max_page_size = int(os.getenv('PAGE_MAX_SIZE') or 500)
+
+
+def response(result=[], error=None, meta=None):
     '''Compose the standard app response.
     
     ARGS:
         result: The result of the request.
         error: The error given by the request.
+        meta: Optional information about the result, like the page cursor.
     RETURNS:
         response: The JSON response.
     '''
@@ -22,7 +30,11 @@ def response(result=[], error=None):
     code = 200
 
     if error:
-        code = error.code if hasattr(error, 'code') else 500
+        code = getattr(error, 'code', None)
+
+        # Not HTTP errors, like SQLAlchemy ones, have string codes
+        if not isinstance(code, int):
+            code = 500
 
         error = {
             'type': type(error).__name__,
@@ -33,16 +45,41 @@ def response(result=[], error=None):
             error['traceback'] = traceback.format_exc()
             error['code'] = code
 
+    body = {
+        'result': result,
+        'error': error
+    }
+
+    if meta is not None:
+        body['meta'] = meta
+
     return flask.make_response(
-        flask.jsonify({
-            'result': result,
-            'error': error
-        }),
+        flask.jsonify(body),
         code,
         {'Content-Type': 'application/json'}
     )
 
 
+def json_line(result=None, error=None) -> str:
+    '''Compose a standard response object as a line of an NDJSON stream.
+    
+    ARGS:
+        result: The result to send.
+        error: The error which ended the stream.
+    RETURNS:
+        line: The JSON object followed by a newline.
+    '''
+    body = {'result': result, 'error': None}
+
+    if error:
+        body['error'] = {
+            'type': type(error).__name__,
+            'message': str(error)
+        }
+
+    return flask.json.dumps(body) + '\n'
+
+
 def error(e):
     '''The handler for all app errors.
     
@@ -79,6 +116,63 @@ def get_request(required_keys:list=[]) -> dict:
     return request
 
 
+def get_page(request:dict) -> dict:
+    '''Pops the keyset pagination keys from the request.
+
+    The 'limit' key is the maximum amount of results and the 'after' key the
+    cursor given with the previous page. The limit is PAGE_SIZE if missing
+    and at most PAGE_MAX_SIZE, so a list is never returned whole.
+    
+    ARGS:
+        request: the request, as returned by get_request.
+    RETURNS:
+        page: the limit and after arguments for the entities get_all.
+    RAISES:
+        400 response: Bad request if the keys are not positive integers.
+    '''
+    page = {}
+
+    for key in ['limit', 'after']:
+        value = request.pop(key, None)
+
+        if value in [None, '']:
+            page[key] = None
+        elif str(value).isdigit():
+            page[key] = int(value)
+        else:
+            flask.abort(400)
+    
+    if page['limit'] == 0:
+        flask.abort(400)
+
+    page['limit'] = min(page['limit'] or page_size, max_page_size)
+    
+    return page
+
+
+def page_response(result:list, limit:int=None):
+    '''Compose the app response for a page of entities.
+
+    The meta contains the next_cursor to give as 'after' to get the next
+    page, it is None on the last page, and the limit applied.
+    
+    ARGS:
+        result: The entities of the page.
+        limit: The page limit given to get_all.
+    RETURNS:
+        response: The JSON response.
+    '''
+    next_cursor = None
+
+    if limit and len(result) == limit:
+        next_cursor = result[-1].id
+    
+    return response(result, meta={
+        'next_cursor': next_cursor,
+        'limit': limit
+    })
+
+
 def jwt_required(roles=[]):
     '''Check if the current user has the required role'''
     
@@ -0,0 +1,207 @@
+import pickle
+import sqlite3
+import threading
+import time as timer
+from collections import OrderedDict
+
+
+'''All the caches created, by name, to expose their statistics'''
+caches = {}
+
+
+class Cache:
+    '''Thread-safe LRU cache with expiration and optional persistence.
+
+    The entries live in memory, bounded to max_size by evicting the least
+    recently used ones. If a path is given, they are also written to a
+    SQLite file, so they survive restarts and are shared by the processes.
+
+    Attributes:
+        name: The name of the cache, used in the statistics.
+        max_size: The maximum amount of entries in memory.
+        ttl: The default time to live of the entries in seconds.
+        path: The path of the SQLite file, None to keep the cache in memory.
+        hits: The amount of lookups which found a fresh entry.
+        misses: The amount of lookups which didn't.
+        evictions: The amount of entries evicted from memory by the bound.
+    '''
+    def __init__(
+        self,
+        name:str,
+        max_size:int=1000,
+        ttl:int=3600,
+        path:str=None
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path or None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path:
+            self._execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB, expires REAL)',
+                'CREATE INDEX IF NOT EXISTS ix_cache_expires ON cache (expires)'
+            )
+
+        caches[name] = self
+
+
+    def _execute(self, *statements) -> tuple:
+        '''Runs statements in one transaction on the SQLite file.
+
+        ARGS:
+            statements: The SQL statements, as strings or (SQL, parameters)
+                        tuples.
+
+        RETURNS:
+            row: The first row returned by the last statement, if any.
+        '''
+        connection = sqlite3.connect(self.path, timeout=10)
+
+        try:
+            with connection:
+                for statement in statements:
+                    if isinstance(statement, str):
+                        statement = (statement, ())
+
+                    cursor = connection.execute(*statement)
+
+                return cursor.fetchone()
+
+        finally:
+            connection.close()
+
+
+    def _read(self, key):
+        '''Reads a fresh entry from the SQLite file'''
+        row = self._execute((
+            'SELECT value, expires FROM cache WHERE key = ? AND expires > ?',
+            (repr(key), timer.time())
+        ))
+
+        return (pickle.loads(row[0]), row[1]) if row else None
+
+
+    def _write(self, key, value, expires:float):
+        '''Writes an entry to the SQLite file, removing the expired ones'''
+        self._execute(
+            ('DELETE FROM cache WHERE expires <= ?', (timer.time(),)),
+            (
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                (repr(key), pickle.dumps(value), expires)
+            )
+        )
+
+
+    def _store(self, key, value, expires:float):
+        '''Stores an entry in memory, evicting the least recently used'''
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+
+    def get(self, key, default=None):
+        '''Gets a fresh entry.
+
+        ARGS:
+            key: The entry key, it has to be hashable and have a stable repr.
+            default: The value returned if there is no fresh entry.
+
+        RETURNS:
+            value: The cached value or the default.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry and entry[1] > timer.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self._entries.pop(key, None)
+
+        entry = self._read(key) if self.path else None
+
+        if entry:
+            self._store(key, *entry)
+
+            with self._lock:
+                self.hits += 1
+
+            return entry[0]
+
+        with self._lock:
+            self.misses += 1
+
+        return default
+
+
+    def set(self, key, value, ttl:int=None):
+        '''Sets an entry.
+
+        ARGS:
+            key: The entry key, see get.
+            value: The value to cache, it has to be picklable if persisted.
+            ttl: The time to live in seconds, the cache ttl if None.
+        '''
+        expires = timer.time() + (self.ttl if ttl is None else ttl)
+        self._store(key, value, expires)
+
+        if self.path:
+            self._write(key, value, expires)
+
+
+    def delete(self, key):
+        '''Deletes an entry'''
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self.path:
+            self._execute(('DELETE FROM cache WHERE key = ?', (repr(key),)))
+
+
+    def clear(self):
+        '''Deletes all the entries'''
+        with self._lock:
+            self._entries.clear()
+
+        if self.path:
+            self._execute('DELETE FROM cache')
+
+
+    def get_stats(self) -> dict:
+        '''Gets the cache statistics.
+
+        RETURNS:
+            stats: The size, bound and counters of the cache.
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'persistent': bool(self.path),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0
+            }
+
+
+def get_stats() -> dict:
+    '''Gets the statistics of all the caches, by name'''
+    return {name: cache.get_stats() for name, cache in caches.items()}
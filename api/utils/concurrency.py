@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def map_concurrently(function, items:list, max_workers:int=8) -> list:
+    '''Calls a function on each item in a bounded thread pool.
+
+    At most max_workers calls run at the same time and the results keep the
+    items order, whatever the calls completion order. An exception raised by
+    a call is raised again, once the running calls are done.
+
+    The calls run outside the request context, so their database sessions
+    are not the request one.
+
+    ARGS:
+        function: The function to call with each item.
+        items: The items.
+        max_workers: The maximum amount of concurrent calls, the calls run
+                     sequentially in the current thread if it is 1 or less.
+
+    RETURNS:
+        results: The results of the calls, in the items order.
+    '''
+    items = list(items)
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(items))
+    ) as executor:
+        return list(executor.map(function, items))
+
+
+class _Call:
+    '''A call in flight, with its outcome once done'''
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    '''Coalesces the concurrent calls with the same key.
+
+    While a call runs, the calls with its key wait for it and share its
+    result or its exception instead of running. The next call after it is
+    done runs again.
+    '''
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+
+    def do(self, key, function, timeout:float=None) -> tuple:
+        '''Calls a function once for all the concurrent calls with a key.
+
+        ARGS:
+            key: The call key, it has to be hashable.
+            function: The function to call without arguments.
+            timeout: The maximum wait in seconds for a running call, no limit
+                     if None.
+
+        RETURNS:
+            result: The function result.
+            shared: If the result comes from the call of another thread.
+
+        RAISES:
+            TimeoutError: If the running call didn't end within the timeout.
+        '''
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+
+            if not shared:
+                call = self._calls[key] = _Call()
+
+        if shared:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"The call {key!r} didn't end in time")
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result, True
+
+        try:
+            call.result = function()
+
+        except BaseException as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.result, False
@@ -0,0 +1,50 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+'''The statuses worth retrying: rate limiting and server errors'''
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+def create_session(
+    pool_size:int=10,
+    retries:int=3,
+    backoff:float=0.5
+) -> requests.Session:
+    '''Creates an HTTP session pooling its connections.
+
+    The connections are kept alive and reused by the requests to the same
+    host. The idempotent requests failing with a connection error or a
+    retry status are retried with an exponential backoff, honouring the
+    Retry-After header. Once the retries are exhausted, the last response
+    is returned.
+
+    ARGS:
+        pool_size: The maximum amount of connections kept per host.
+        retries: The maximum amount of retries per request.
+        backoff: The backoff factor in seconds, the retries wait
+                 backoff * 2 ** (retry - 1).
+
+    RETURNS:
+        session: The requests session.
+    '''
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=['HEAD', 'GET', 'OPTIONS'],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
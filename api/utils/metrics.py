@@ -0,0 +1,160 @@
+import threading
+import time as timer
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+'''All the histograms created, by name, to expose their statistics'''
+histograms = {}
+
+
+'''The event counters, by name'''
+counters = {}
+_counters_lock = threading.Lock()
+
+
+'''All the moving averages created, by name'''
+averages = {}
+_averages_lock = threading.Lock()
+
+
+'''The default bucket upper bounds in seconds, for external API latencies'''
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+class Histogram:
+    '''Thread-safe histogram of observed values.
+
+    Attributes:
+        name: The name of the histogram, used in the statistics.
+        buckets: The sorted upper bounds of the buckets, a last bucket
+                 without bound holds the greater values.
+        count: The amount of observed values.
+        sum: The sum of the observed values.
+    '''
+    def __init__(self, name:str, buckets:list=LATENCY_BUCKETS):
+        self.name = name
+        self.buckets = sorted(buckets)
+        self.count = 0
+        self.sum = 0
+
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+
+        histograms[name] = self
+
+
+    def observe(self, value:float):
+        '''Adds a value to the histogram'''
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+
+    @contextmanager
+    def time(self):
+        '''Observes the duration of the block in seconds, even if it raises'''
+        start = timer.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            self.observe(timer.perf_counter() - start)
+
+
+    def get_stats(self) -> dict:
+        '''Gets the histogram statistics.
+
+        RETURNS:
+            stats: The count, sum, mean and the cumulative count of each
+                   bucket, by upper bound.
+        '''
+        with self._lock:
+            cumulative_counts = []
+            total = 0
+
+            for count in self._counts:
+                total += count
+                cumulative_counts.append(total)
+
+            return {
+                'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else 0,
+                'buckets': [
+                    [bound, count]
+                    for bound, count in zip(
+                        self.buckets + ['+Inf'],
+                        cumulative_counts
+                    )
+                ]
+            }
+
+
+class Average:
+    '''Thread-safe exponential moving average of observed values.
+
+    It starts from a prior value, so it gives an estimation before the first
+    observation, and follows the recent values more than the old ones.
+
+    Attributes:
+        name: The name of the average, used in the statistics.
+        value: The current average.
+        alpha: The weight of a new value, from 0 to 1.
+        count: The amount of observed values.
+    '''
+    def __init__(self, name:str, value:float, alpha:float=0.1):
+        self.name = name
+        self.value = value
+        self.alpha = alpha
+        self.count = 0
+
+        self._lock = threading.Lock()
+
+        averages[name] = self
+
+
+    def observe(self, value:float):
+        '''Moves the average towards a value'''
+        with self._lock:
+            self.value += self.alpha * (value - self.value)
+            self.count += 1
+
+
+def get_average(name:str, value:float, alpha:float=0.1) -> Average:
+    '''Gets a moving average, creating it from a prior value if needed'''
+    with _averages_lock:
+        if name not in averages:
+            Average(name, value, alpha)
+
+        return averages[name]
+
+
+def get_averages() -> dict:
+    '''Gets the values of all the moving averages, by name'''
+    return {
+        name: {'value': average.value, 'count': average.count}
+        for name, average in list(averages.items())
+    }
+
+
+def get_stats() -> dict:
+    '''Gets the statistics of all the histograms, by name'''
+    return {
+        name: histogram.get_stats()
+        for name, histogram in histograms.items()
+    }
+
+
+def increment(name:str, amount:int=1):
+    '''Adds an amount to an event counter, creating it if needed'''
+    with _counters_lock:
+        counters[name] = counters.get(name, 0) + amount
+
+
+def get_counters() -> dict:
+    '''Gets the values of all the event counters, by name'''
+    with _counters_lock:
+        return dict(counters)
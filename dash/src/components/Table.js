@@ -97,6 +97,8 @@ const TableButton = props => {
  * @property  {CallableFunction}  onEdit     The function to call on edit button click
  * @property  {CallableFunction}  onDelete   The function to call on delete button click
  * @property  {boolean}           isLoading  If the table is loading
+ * @property  {boolean}           hasMore    If more rows can be loaded
+ * @property  {CallableFunction}  onLoadMore The function to call when the next page needs more rows
  * @component
  */
 const Table = props => {
@@ -108,7 +110,9 @@ const Table = props => {
     onCreate,
     onEdit,
     onDelete,
-    isLoading
+    isLoading,
+    hasMore,
+    onLoadMore
   } = props;
 
   const [order, setOrder] = useState('asc');
@@ -122,13 +126,22 @@ const Table = props => {
     setOrderBy(property);
   };
 
+  // Loads the next rows if the page shown goes beyond the loaded ones
+  const loadRows = (newPage, newRowsPerPage) => {
+    if (hasMore && onLoadMore && (newPage + 1) * newRowsPerPage > rows.length) {
+      onLoadMore();
+    }
+  };
+
   const handleChangePage = (event, newPage) => {
     setPage(newPage);
+    loadRows(newPage, rowsPerPage);
   };
 
   const handleChangeRowsPerPage = (event) => {
     setRowsPerPage(+event.target.value);
     setPage(0);
+    loadRows(0, +event.target.value);
   };
 
   const formatValue = (value, column) => {
@@ -298,7 +311,7 @@ const Table = props => {
         }
         <TablePagination
           rowsPerPageOptions={[25, 50, 100]}
-          count={rows.length}
+          count={hasMore ? -1 : rows.length}
           rowsPerPage={rowsPerPage}
           page={page}
           onPageChange={handleChangePage}
@@ -64,26 +64,34 @@ const typeList = [
  * @component
  */
 export default function PartnersPage() {
-  const { apiCall } = useApi();
+  const { apiCall, apiCallPage } = useApi();
 
   const [isLoading, setIsLoading] = useState(true);
   const [rows, setRows] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [formData, setFormData] = useState(emptyFormData);
   const [formError, setFormError] = useState('');
 
-  useEffect(() => {
-    setIsLoading(true);
-    apiCall(
-      `/${apiPath}`,
-      'GET'
-    )
+  // Loads the first page of rows, or the next one after a cursor
+  const loadRows = (after=null) => {
+    apiCallPage(`/${apiPath}`, after)
     .then(response => {
       setIsLoading(false);
       if (!response.error) {
-        setRows(response.result);
+        setRows(previousRows => after === null ?
+          response.result
+          :
+          previousRows.concat(response.result)
+        );
+        setNextCursor(response.meta ? response.meta.next_cursor : null);
       }
     });
+  }
+
+  useEffect(() => {
+    setIsLoading(true);
+    loadRows();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
@@ -104,15 +112,7 @@ export default function PartnersPage() {
     )
     .then(response => {
       if (!response.error) {
-        apiCall(
-          `/${apiPath}`,
-          'GET'
-        )
-        .then(response => {
-          if (!response.error) {
-            setRows(response.result);
-          }
-        });
+        loadRows();
       }
     });
   }
@@ -151,15 +151,7 @@ export default function PartnersPage() {
       )
       .then(response => {
         if (!response.error) {
-          apiCall(
-            `/${apiPath}`,
-            'GET'
-          )
-          .then(response => {
-            if (!response.error) {
-              setRows(response.result);
-            }
-          });
+          loadRows();
         }
       });
     }
@@ -197,6 +189,8 @@ export default function PartnersPage() {
         onEdit={handleTableEdit}
         onDelete={handleTableDelete}
         isLoading={isLoading}
+        hasMore={nextCursor !== null}
+        onLoadMore={() => loadRows(nextCursor)}
       />
       <DialogForm
         open={dialogOpen}
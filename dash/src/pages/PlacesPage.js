@@ -38,23 +38,31 @@ const tableColumns = [
  * @component
  */
 export default function PlacesPage() {
-  const { apiCall } = useApi();
+  const { apiCallPage } = useApi();
 
   const [isLoading, setIsLoading] = useState(true);
   const [rows, setRows] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // Loads the first page of rows, or the next one after a cursor
+  const loadRows = (after=null) => {
+    apiCallPage(`/${apiPath}`, after)
+    .then(response => {
+      setIsLoading(false);
+      if (!response.error) {
+        setRows(previousRows => after === null ?
+          response.result
+          :
+          previousRows.concat(response.result)
+        );
+        setNextCursor(response.meta ? response.meta.next_cursor : null);
+      }
+    });
+  }
 
   useEffect(() => {
     setIsLoading(true);
-    apiCall(
-      `/${apiPath}`,
-      'GET'
-    )
-      .then(response => {
-        setIsLoading(false);
-        if (!response.error) {
-          setRows(response.result);
-        }
-      });
+    loadRows();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
@@ -77,6 +85,8 @@ export default function PlacesPage() {
         columns={tableColumns}
         rows={rows}
         isLoading={isLoading}
+        hasMore={nextCursor !== null}
+        onLoadMore={() => loadRows(nextCursor)}
       />
     </>
   );
@@ -37,23 +37,31 @@ import {
    * @component
    */
   export default function ReviewPage() {
-    const { apiCall } = useApi();
+    const { apiCall, apiCallPage } = useApi();
   
     const [isLoading, setIsLoading] = useState(true);
     const [rows, setRows] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
   
+    // Loads the first page of rows, or the next one after a cursor
+    const loadRows = (after=null) => {
+      apiCallPage(`/${apiPath}`, after)
+      .then(response => {
+        setIsLoading(false);
+        if (!response.error) {
+          setRows(previousRows => after === null ?
+            response.result
+            :
+            previousRows.concat(response.result)
+          );
+          setNextCursor(response.meta ? response.meta.next_cursor : null);
+        }
+      });
+    }
+
     useEffect(() => {
       setIsLoading(true);
-      apiCall(
-        `/${apiPath}`,
-        'GET'
-      )
-        .then(response => {
-        setIsLoading(false);
-          if (!response.error) {
-            setRows(response.result);
-          }
-        });
+      loadRows();
       // eslint-disable-next-line react-hooks/exhaustive-deps
     }, []);
   
@@ -64,15 +72,7 @@ import {
       )
         .then(response => {
           if (!response.error) {
-            apiCall(
-              `/${apiPath}`,
-              'GET'
-            )
-              .then(response => {
-                if (!response.error) {
-                  setRows(response.result);
-                }
-              });
+            loadRows();
           }
         });
     }
@@ -84,6 +84,8 @@ import {
           rows={rows}
           onDelete={handleTableDelete}
           isLoading={isLoading}
+          hasMore={nextCursor !== null}
+          onLoadMore={() => loadRows(nextCursor)}
         />
       </Paper>
     );
@@ -60,26 +60,34 @@ const roleList = [
  * @component
  */
 export default function UsersPage() {
-  const { apiCall } = useApi();
+  const { apiCall, apiCallPage } = useApi();
 
   const [isLoading, setIsLoading] = useState(true);
   const [rows, setRows] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [formData, setFormData] = useState(emptyFormData);
   const [formError, setFormError] = useState('');
 
+  // Loads the first page of rows, or the next one after a cursor
+  const loadRows = (after=null) => {
+    apiCallPage(`/${apiPath}`, after)
+    .then(response => {
+      setIsLoading(false);
+      if (!response.error) {
+        setRows(previousRows => after === null ?
+          response.result
+          :
+          previousRows.concat(response.result)
+        );
+        setNextCursor(response.meta ? response.meta.next_cursor : null);
+      }
+    });
+  }
+
   useEffect(() => {
     setIsLoading(true);
-    apiCall(
-      `/${apiPath}`,
-      'GET'
-    )
-      .then(response => {
-      setIsLoading(false);
-        if (!response.error) {
-          setRows(response.result);
-        }
-      });
+    loadRows();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
@@ -100,15 +108,7 @@ export default function UsersPage() {
     )
       .then(response => {
         if (!response.error) {
-          apiCall(
-            `/${apiPath}`,
-            'GET'
-          )
-            .then(response => {
-              if (!response.error) {
-                setRows(response.result);
-              }
-            });
+          loadRows();
         }
       });
   }
@@ -150,15 +150,7 @@ export default function UsersPage() {
       )
         .then(response => {
           if (!response.error) {
-            apiCall(
-              `/${apiPath}`,
-              'GET'
-            )
-              .then(response => {
-                if (!response.error) {
-                  setRows(response.result);
-                }
-              });
+            loadRows();
           }
         });
     }
@@ -183,6 +175,8 @@ export default function UsersPage() {
         onEdit={handleTableEdit}
         onDelete={handleTableDelete}
         isLoading={isLoading}
+        hasMore={nextCursor !== null}
+        onLoadMore={() => loadRows(nextCursor)}
       />
       <DialogForm
         open={dialogOpen}
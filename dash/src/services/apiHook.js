@@ -88,5 +88,19 @@ export default function useApi() {
     return apiResponse;
   };
 
-  return { apiCall };
+  /**
+   * Returns one page of a paginated list endpoint.
+   * The next page starts after the next_cursor of the response meta.
+   * @param {string} endpoint The endpoint of the list.
+   * @param {integer} after The cursor after which the page starts.
+   * @returns {object} The backend response with the page results.
+   */
+  const apiCallPage = (endpoint, after=null) => {
+    return apiCall(
+      after === null ? endpoint : `${endpoint}?after=${after}`,
+      'GET'
+    );
+  };
+
+  return { apiCall, apiCallPage };
 }
\ No newline at end of file